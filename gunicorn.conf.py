@@ -0,0 +1,17 @@
+import os
+import shutil
+
+# Has to be set before the workers import prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/taskscheduler-metrics")
+
+
+def on_starting(server):
+    # Values left by a previous run would be added to the new ones
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
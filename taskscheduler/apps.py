@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class TaskschedulerConfig(AppConfig):
+    name = "taskscheduler"
+
+    def ready(self):
+        from taskscheduler import signals  # noqa: F401
@@ -0,0 +1,153 @@
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+
+from taskscheduler.calendars import ResourceCalendar
+from taskscheduler.datasets import DatasetGenerator
+from taskscheduler.helpers import (can_assign_resource,
+                                   find_earliest_assignment, load_calendars)
+from taskscheduler.middleware import QueryRecorder
+from taskscheduler.models import Project, Resource, Task
+
+METRICS = ("wall_time", "queries", "sql_time", "peak_memory")
+# Time differences below this are noise whatever the threshold
+MIN_TIME_DELTA = 0.005
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def rolled_back(function):
+    with transaction.atomic():
+        try:
+            return function()
+        finally:
+            transaction.set_rollback(True)
+
+
+def measure(function):
+    """
+    Runs the function twice in a rolled back transaction, once timed and once
+    traced for the peak memory as tracemalloc slows everything down.
+    """
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        started = time.perf_counter()
+        rolled_back(function)
+        wall_time = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        rolled_back(function)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "wall_time": wall_time,
+        "queries": recorder.queries,
+        "sql_time": recorder.sql_time,
+        "peak_memory": peak_memory,
+    }
+
+
+def check_response(response):
+    if response.status_code != 200:
+        raise BenchmarkError(f"{response.status_code}: {response.content[:200]}")
+
+
+def scheduler_cases(project_id, sample):
+    # Imported here as the views import the whole API
+    from taskscheduler.views import AssignmentsCreateView, PlanCreateView
+
+    task_ids = list(
+        Task.unassigned_objects.filter(project=project_id)
+        .order_by("id")
+        .values_list("id", flat=True)[:sample]
+    )
+    resource_ids = list(
+        Resource.objects.order_by("id").values_list("id", flat=True)[:sample]
+    )
+    start_date = date.today() + timedelta(days=1)
+    # Conflicts are checked against calendars read once, like the planner does
+    calendars = load_calendars(resource_ids=resource_ids, since=start_date)
+    return {
+        "find_earliest_assignment": lambda: [
+            find_earliest_assignment(task_id) for task_id in task_ids
+        ],
+        "can_assign_resource": lambda: [
+            can_assign_resource(
+                resource_id,
+                task_id,
+                start_date,
+                start_date + timedelta(days=2),
+                calendar=calendars.get(resource_id, ResourceCalendar()),
+            )
+            for task_id, resource_id in zip(task_ids, resource_ids)
+        ],
+        "plan": lambda: check_response(
+            PlanCreateView().run({"project_id": project_id})
+        ),
+        "assign": lambda: check_response(
+            AssignmentsCreateView().run({"project_id": project_id})
+        ),
+    }
+
+
+def run_benchmarks(scales, sample=20, seed=0, cases=None, report=None):
+    """
+    Generates a project of every scale in tasks and measures the cases on it.
+
+    Nothing is kept, each scale runs in a transaction rolled back at the end.
+    """
+    results = {}
+    for scale in scales:
+
+        def run_scale():
+            DatasetGenerator(
+                projects=1,
+                tasks_per_project=scale,
+                resources=max(5, scale // 50),
+                seed=seed,
+            ).generate()
+            project_id = Project.objects.order_by("-id").values_list("id", flat=True)[0]
+            measured = {}
+            for name, function in scheduler_cases(project_id, sample).items():
+                if cases and name not in cases:
+                    continue
+                measured[name] = measure(function)
+                if report is not None:
+                    report(scale, name, measured[name])
+            return measured
+
+        results[str(scale)] = rolled_back(run_scale)
+    return {"sample": sample, "seed": seed, "results": results}
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Lists the measurements worse than the baseline by more than the threshold.
+
+    Query counts are exact so any increase of them is a regression.
+    """
+    regressions = []
+    for scale, cases in current["results"].items():
+        for name, metrics in cases.items():
+            base = baseline["results"].get(scale, {}).get(name)
+            if base is None:
+                continue
+            for metric in METRICS:
+                before, after = base[metric], metrics[metric]
+                if metric == "queries":
+                    worse = after > before
+                else:
+                    worse = after > before * (1 + threshold)
+                    if metric != "peak_memory":
+                        worse = worse and after - before > MIN_TIME_DELTA
+                if worse:
+                    regressions.append(
+                        f"{scale} tasks {name} {metric}: {before} -> {after}"
+                    )
+    return regressions
@@ -0,0 +1,244 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+
+
+def is_pk(value):
+    if isinstance(value, str):
+        return value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks the object up in the ones BulkListSerializer loaded for the whole list.
+    """
+
+    bulk_objects = None
+
+    def to_internal_value(self, data):
+        if self.bulk_objects is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, (int, str)) or isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if str(data) not in self.bulk_objects:
+            self.fail("does_not_exist", pk_value=data)
+        return self.bulk_objects[str(data)]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a list with one in_bulk query per related field and saves it
+    with bulk_create or bulk_update, the errors are reported per item.
+
+    Updates expect the instance to be the in_bulk dict of the objects to update
+    and every item to carry its id.
+    """
+
+    def related_fields(self):
+        for field_name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, ManyRelatedField):
+                if isinstance(field.child_relation, BulkPrimaryKeyRelatedField):
+                    yield field_name, field.child_relation, True
+            elif isinstance(field, BulkPrimaryKeyRelatedField):
+                yield field_name, field, False
+
+    def load_related(self, data):
+        for field_name, field, many in self.related_fields():
+            pks = set()
+            for item in data:
+                if not isinstance(item, dict):
+                    continue
+                values = item.get(field_name)
+                if not many or not isinstance(values, list):
+                    values = [values]
+                pks.update(int(value) for value in values if is_pk(value))
+            field.bulk_objects = {
+                str(pk): obj for pk, obj in field.get_queryset().in_bulk(pks).items()
+            }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        self.load_related(data)
+        try:
+            if self.instance is None:
+                return super().to_internal_value(data)
+            return self.validate_updates(data)
+        finally:
+            for _, field, _ in self.related_fields():
+                field.bulk_objects = None
+
+    def validate_updates(self, data):
+        # Every item is validated against the instance it updates
+        self.item_instances = []
+        ret = []
+        errors = []
+        for item in data:
+            pk = item.get("id") if isinstance(item, dict) else None
+            instance = self.instance.get(int(pk)) if is_pk(pk) else None
+            if instance is None:
+                errors.append({"id": ["Object to update does not exist."]})
+                continue
+            self.child.instance = instance
+            try:
+                validated = self.child.run_validation(item)
+            except ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                ret.append(validated)
+                self.item_instances.append(instance)
+                errors.append({})
+        self.child.instance = None
+
+        if any(errors):
+            raise ValidationError(errors)
+        return ret
+
+    def split_many_to_many(self, attrs):
+        model = self.child.Meta.model
+        many_to_many = {}
+        for name in list(attrs):
+            if model._meta.get_field(name).many_to_many:
+                many_to_many[name] = attrs.pop(name)
+        return attrs, many_to_many
+
+    def set_many_to_many(self, instances, relations, clear=False):
+        model = self.child.Meta.model
+        for name in {name for many_to_many in relations for name in many_to_many}:
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            changed = [
+                (instance, {obj.pk for obj in many_to_many[name]})
+                for instance, many_to_many in zip(instances, relations)
+                if name in many_to_many
+            ]
+            if clear:
+                through.objects.filter(
+                    **{f"{source}__in": [instance.pk for instance, _ in changed]}
+                ).delete()
+            through.objects.bulk_create(
+                through(**{source: instance.pk, target: pk})
+                for instance, pk_set in changed
+                for pk in pk_set
+            )
+            # bulk_create sends no signals, the skill indexes still need them
+            actions = [("post_clear", None)] if clear else []
+            for instance, pk_set in changed:
+                for action, pks in actions + [("post_add", pk_set)]:
+                    m2m_changed.send(
+                        sender=through,
+                        instance=instance,
+                        action=action,
+                        reverse=False,
+                        model=field.related_model,
+                        pk_set=pks,
+                        using=instance._state.db,
+                    )
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        instances = []
+        relations = []
+        for attrs in validated_data:
+            attrs, many_to_many = self.split_many_to_many(
+                self.child.prepare_create(dict(attrs))
+            )
+            instances.append(model(**attrs))
+            relations.append(many_to_many)
+        model._default_manager.bulk_create(instances)
+        for instance in instances:
+            post_save.send(
+                sender=model,
+                instance=instance,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=instance._state.db,
+            )
+        self.set_many_to_many(instances, relations)
+        return instances
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        relations = []
+        fields = set()
+        for item_instance, attrs in zip(self.item_instances, validated_data):
+            attrs, many_to_many = self.split_many_to_many(dict(attrs))
+            for name, value in attrs.items():
+                setattr(item_instance, name, value)
+                fields.add(name)
+            relations.append(many_to_many)
+        if fields:
+            model._default_manager.bulk_update(self.item_instances, fields)
+        self.set_many_to_many(self.item_instances, relations, clear=True)
+        self.child.bulk_updated(self.item_instances, validated_data)
+        return self.item_instances
+
+
+class BulkModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer to be used with list_serializer_class = BulkListSerializer.
+    """
+
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
+    def prepare_create(self, validated_data):
+        return validated_data
+
+    def bulk_updated(self, instances, validated_data):
+        pass
+
+
+class BulkMixin:
+    """
+    Adds POST (create) and PATCH (update) of a list of objects on <prefix>/bulk/.
+    """
+
+    @action(detail=False, methods=["post", "patch"])
+    def bulk(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return Response(
+                {"message": "Expected a list of items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        instance = None
+        if request.method == "PATCH":
+            instance = self.get_queryset().in_bulk(
+                [
+                    int(item["id"])
+                    for item in request.data
+                    if isinstance(item, dict) and is_pk(item.get("id"))
+                ]
+            )
+        serializer = self.get_serializer(
+            instance,
+            data=request.data,
+            many=True,
+            partial=request.method == "PATCH",
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            instances = serializer.save()
+
+        # Read back so the response is built with the view's prefetches
+        saved = self.get_queryset().in_bulk([instance.pk for instance in instances])
+        response_serializer = self.get_serializer(
+            [saved[instance.pk] for instance in instances], many=True
+        )
+        return Response(
+            response_serializer.data,
+            status=(
+                status.HTTP_201_CREATED
+                if request.method == "POST"
+                else status.HTTP_200_OK
+            ),
+        )
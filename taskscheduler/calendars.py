@@ -0,0 +1,182 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+
+
+class GapTree:
+    """
+    Largest gap before a busy block over any range of days.
+
+    A max segment tree over the day ordinals, kept sparse in a dict, gives
+    the first block after a gap of more than N days in logarithmic time.
+    """
+
+    # Covers the ordinal of every date
+    SIZE = 1 << 22
+    # Gap before the first block, which nothing precedes
+    UNBOUNDED = SIZE
+
+    def __init__(self):
+        self._max = {}
+
+    def get(self, day):
+        return self._max.get(self.SIZE + day, 0)
+
+    def set(self, day, gap):
+        node = self.SIZE + day
+        self._max[node] = gap
+        self._update(node // 2)
+
+    def discard(self, day):
+        node = self.SIZE + day
+        if self._max.pop(node, None) is not None:
+            self._update(node // 2)
+
+    def _update(self, node):
+        values = self._max
+        while node:
+            largest = max(values.get(2 * node, 0), values.get(2 * node + 1, 0))
+            if largest:
+                values[node] = largest
+            else:
+                values.pop(node, None)
+            node //= 2
+
+    def first_above(self, day, gap):
+        """
+        First day on or after `day` holding a gap longer than `gap`, or None.
+        """
+        return self._search(1, 0, self.SIZE, day, gap)
+
+    def _search(self, node, low, high, day, gap):
+        if high <= day or self._max.get(node, 0) <= gap:
+            return None
+        if node >= self.SIZE:
+            return low
+        middle = (low + high) // 2
+        found = self._search(2 * node, low, middle, day, gap)
+        if found is None:
+            found = self._search(2 * node + 1, middle, high, day, gap)
+        return found
+
+
+class ResourceCalendar:
+    """
+    Busy periods of a single resource.
+
+    Assignments are kept by key so they can be removed again, and merged into
+    sorted, disjoint busy blocks which the gap and conflict searches bisect.
+    The gap before every block is indexed by a `GapTree`, so adding or
+    removing an assignment and searching a gap are logarithmic in the blocks.
+    Dates are inclusive like `Assignments.start_date`/`end_date`.
+    """
+
+    def __init__(self, intervals=()):
+        # Entries are (start_date, end_date, sequence, key), the sequence
+        # keeps them ordered without ever comparing the keys
+        self._intervals = {}
+        self._sorted = []
+        self._sequence = 0
+        self._starts = []
+        self._ends = []
+        self._gaps = GapTree()
+        for start_date, end_date, key in intervals:
+            self.add(start_date, end_date, key)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def __iter__(self):
+        return ((start_date, end_date) for start_date, end_date, _, _ in self._sorted)
+
+    def add(self, start_date, end_date, key=None):
+        if key is None:
+            key = object()
+        self._sequence += 1
+        entry = (start_date, end_date, self._sequence, key)
+        self._intervals[key] = entry
+        insort(self._sorted, entry)
+        self._merge(start_date, end_date)
+        return key
+
+    def remove(self, key):
+        entry = self._intervals.pop(key)
+        del self._sorted[bisect_left(self._sorted, entry)]
+
+        # Only the block which held the assignment changes, its other
+        # assignments are merged again on their own
+        index = bisect_right(self._starts, entry[0]) - 1
+        block_start_date = self._starts[index]
+        low = bisect_left(self._sorted, (block_start_date,))
+        high = bisect_left(self._sorted, (self._ends[index] + timedelta(days=1),))
+        starts, ends = [], []
+        for start_date, end_date, _, _ in self._sorted[low:high]:
+            if ends and start_date <= ends[-1]:
+                ends[-1] = max(ends[-1], end_date)
+            else:
+                starts.append(start_date)
+                ends.append(end_date)
+
+        self._gaps.discard(block_start_date.toordinal())
+        self._starts[index : index + 1] = starts
+        self._ends[index : index + 1] = ends
+        for position in range(index, index + len(starts) + 1):
+            self._index_gap(position)
+
+    def _merge(self, start_date, end_date):
+        # Blocks from `low` up to `high` share at least one day with the new period
+        low = bisect_left(self._ends, start_date)
+        high = bisect_right(self._starts, end_date)
+        if low < high:
+            start_date = min(start_date, self._starts[low])
+            end_date = max(end_date, self._ends[high - 1])
+        for merged_start_date in self._starts[low:high]:
+            self._gaps.discard(merged_start_date.toordinal())
+        self._starts[low:high] = [start_date]
+        self._ends[low:high] = [end_date]
+        self._index_gap(low)
+        self._index_gap(low + 1)
+
+    def _index_gap(self, index):
+        if index >= len(self._starts):
+            return
+        if index == 0:
+            gap = GapTree.UNBOUNDED
+        else:
+            gap = (self._starts[index] - self._ends[index - 1]).days
+        self._gaps.set(self._starts[index].toordinal(), gap)
+
+    def find_gap(self, start_date, days):
+        """
+        Earliest start on or after `start_date` which is followed by a gap of
+        `days` before the next busy block, following the same rules as
+        `find_earliest_assignment`.
+        """
+        prev_end_date = start_date - timedelta(days=1)
+        # Blocks ending before the search starts can neither block nor extend it
+        index = bisect_right(self._ends, prev_end_date)
+        if index == len(self._starts) or self._starts[
+            index
+        ] > prev_end_date + timedelta(days=days):
+            return start_date
+
+        # The first later block whose gap before it is long enough
+        day = self._gaps.first_above(self._starts[index].toordinal() + 1, days)
+        if day is None:
+            return self._ends[-1] + timedelta(days=1)
+        return date.fromordinal(day - self._gaps.get(day) + 1)
+
+    def overlaps(self, start_date, end_date, exclude=None):
+        index = bisect_left(self._ends, start_date)
+        if index == len(self._starts) or self._starts[index] > end_date:
+            return False
+        if exclude is None:
+            return True
+        # The excluded assignment may be all the block is made of
+        low = bisect_left(self._sorted, (self._starts[index],))
+        high = bisect_left(self._sorted, (end_date + timedelta(days=1),))
+        return any(
+            key != exclude
+            and interval_start_date <= end_date
+            and interval_end_date >= start_date
+            for interval_start_date, interval_end_date, _, key in self._sorted[low:high]
+        )
@@ -0,0 +1,201 @@
+import itertools
+import random
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+
+from taskscheduler.models import Assignments, Project, Resource, Skill, Task
+from taskscheduler.reference_data import invalidate_reference_data
+from taskscheduler.schedule_data import (csv_record, import_batch,
+                                         reset_sequences, table_columns)
+
+
+class DatasetGenerator:
+    """
+    Deterministic synthetic schedules for benchmarks and capacity tests.
+
+    The same seed and parameters always give the same rows. Every task needs
+    the skills of at least one resource so it can be planned, skill_density
+    is the chance a resource has a skill, assignment_load the share of tasks
+    already assigned and date_constraint_ratio the share of tasks with dates.
+    Rows are written with COPY batch_size at a time through the import path.
+    """
+
+    def __init__(
+        self,
+        projects=10,
+        tasks_per_project=100,
+        resources=50,
+        skills=10,
+        skill_density=0.3,
+        assignment_load=0.2,
+        date_constraint_ratio=0.1,
+        seed=0,
+        start_date=None,
+        horizon_days=90,
+        batch_size=10000,
+    ):
+        self.projects = projects
+        self.tasks_per_project = tasks_per_project
+        self.resources = resources
+        self.skills = skills
+        self.skill_density = skill_density
+        self.assignment_load = assignment_load
+        self.date_constraint_ratio = date_constraint_ratio
+        self.random = random.Random(seed)
+        self.start_date = start_date or date.today()
+        self.horizon_days = horizon_days
+        self.batch_size = batch_size
+        self.counts = {}
+
+    def next_ids(self):
+        models = [
+            Project,
+            Skill,
+            Resource,
+            Resource.skills.through,
+            Task,
+            Task.skills_required.through,
+            Assignments,
+        ]
+        return {
+            model: (model._base_manager.aggregate(last=Max("id"))["last"] or 0) + 1
+            for model in models
+        }
+
+    def write(self, model, rows):
+        columns = table_columns(model)
+        batch = []
+        for row in rows:
+            batch.append(csv_record(row.get(column) for column in columns))
+            if len(batch) == self.batch_size:
+                self.flush(model, columns, batch)
+                batch = []
+        if batch:
+            self.flush(model, columns, batch)
+
+    def flush(self, model, columns, batch):
+        with transaction.atomic():
+            import_batch(model, columns, batch)
+        table = model._meta.db_table
+        self.counts[table] = self.counts.get(table, 0) + len(batch)
+
+    def generate(self):
+        ids = self.next_ids()
+        skill_ids = list(range(ids[Skill], ids[Skill] + self.skills))
+        resource_ids = list(range(ids[Resource], ids[Resource] + self.resources))
+        self.write(
+            Project,
+            (
+                {
+                    "id": ids[Project] + i,
+                    "name": f"Project {i}",
+                    "created_date": self.start_date,
+                    "is_deleted": False,
+                    "completed": False,
+                }
+                for i in range(self.projects)
+            ),
+        )
+        self.write(
+            Skill,
+            (
+                {"id": skill_id, "name": f"Skill {i}"}
+                for i, skill_id in enumerate(skill_ids)
+            ),
+        )
+        self.write(
+            Resource,
+            (
+                {
+                    "id": resource_id,
+                    "name": f"Resource {i}",
+                    "availability_start_date": self.start_date,
+                }
+                for i, resource_id in enumerate(resource_ids)
+            ),
+        )
+
+        resource_skills = {}
+        for resource_id in resource_ids:
+            owned = [
+                skill_id
+                for skill_id in skill_ids
+                if self.random.random() < self.skill_density
+            ]
+            resource_skills[resource_id] = owned or [self.random.choice(skill_ids)]
+        link_ids = itertools.count(ids[Resource.skills.through])
+        self.write(
+            Resource.skills.through,
+            (
+                {"id": next(link_ids), "resource_id": resource_id, "skill_id": skill_id}
+                for resource_id in resource_ids
+                for skill_id in resource_skills[resource_id]
+            ),
+        )
+
+        # Tasks, their skills and assignments are written batch by batch together
+        next_free = {resource_id: self.start_date for resource_id in resource_ids}
+        task_skill_ids = itertools.count(ids[Task.skills_required.through])
+        assignment_ids = itertools.count(ids[Assignments])
+        total = self.projects * self.tasks_per_project
+        for batch_start in range(0, total, self.batch_size):
+            tasks, task_skills, assignments = [], [], []
+            for i in range(batch_start, min(batch_start + self.batch_size, total)):
+                task_id = ids[Task] + i
+                resource_id = self.random.choice(resource_ids)
+                owned = resource_skills[resource_id]
+                required = self.random.sample(
+                    owned, self.random.randint(1, min(3, len(owned)))
+                )
+                estimation = self.random.randint(1, 5)
+                task = {
+                    "id": task_id,
+                    "project_id": ids[Project] + i // self.tasks_per_project,
+                    "name": f"Task {i}",
+                    "created_date": self.start_date,
+                    "estimation": estimation,
+                    "is_deleted": False,
+                    "completed": False,
+                }
+                if self.random.random() < self.date_constraint_ratio:
+                    start_date = self.start_date + timedelta(
+                        days=self.random.randint(1, self.horizon_days)
+                    )
+                    task["start_date"] = start_date
+                    task["end_date"] = start_date + timedelta(
+                        days=estimation + self.random.randint(0, 2 * estimation)
+                    )
+                tasks.append(task)
+                task_skills.extend(
+                    {
+                        "id": next(task_skill_ids),
+                        "task_id": task_id,
+                        "skill_id": skill_id,
+                    }
+                    for skill_id in required
+                )
+                if self.random.random() < self.assignment_load:
+                    start_date = next_free[resource_id] + timedelta(
+                        days=self.random.randint(0, 2)
+                    )
+                    end_date = start_date + timedelta(days=estimation)
+                    next_free[resource_id] = end_date + timedelta(days=1)
+                    assignments.append(
+                        {
+                            "id": next(assignment_ids),
+                            "task_id": task_id,
+                            "resource_id": resource_id,
+                            "start_date": start_date,
+                            "end_date": end_date,
+                            "status": "ASSIGNED",
+                        }
+                    )
+            self.write(Task, tasks)
+            self.write(Task.skills_required.through, task_skills)
+            self.write(Assignments, assignments)
+
+        reset_sequences(list(ids))
+        invalidate_reference_data()
+        return self.counts
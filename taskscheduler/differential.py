@@ -0,0 +1,335 @@
+import copy
+import random
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from taskscheduler.helpers import find_earliest_assignment
+from taskscheduler.models import Assignments, Project, Resource, Skill, Task
+from taskscheduler.planner import Planner, PlanningError
+
+
+class Scenario:
+    """
+    A small schedule described with day offsets from today and list positions.
+
+    resources are (availability start, availability end or None, skill positions),
+    assignments the ones already there as (resource position, start, end,
+    status) and tasks (estimation, start or None, end or None, skill positions)
+    in the order they are planned when their start dates are equal.
+    """
+
+    def __init__(self, skills, resources, assignments, tasks):
+        self.skills = skills
+        self.resources = resources
+        self.assignments = assignments
+        self.tasks = tasks
+
+    def __repr__(self):
+        return (
+            f"Scenario(skills={self.skills}, resources={self.resources}, "
+            f"assignments={self.assignments}, tasks={self.tasks})"
+        )
+
+    def build(self):
+        """
+        Creates the scenario in the database and returns the project planned.
+        """
+        today = date.today()
+
+        def day(offset):
+            return None if offset is None else today + timedelta(days=offset)
+
+        skills = [Skill.objects.create(name=f"Skill {i}") for i in range(self.skills)]
+        resources = []
+        for start, end, skill_positions in self.resources:
+            resource = Resource.objects.create(
+                name="Resource",
+                availability_start_date=day(start),
+                availability_end_date=day(end),
+            )
+            resource.skills.set([skills[i] for i in skill_positions])
+            resources.append(resource)
+
+        existing = Project.objects.create(
+            name="Existing", is_deleted=False, completed=False
+        )
+        for resource_position, start, end, status in self.assignments:
+            task = Task.objects.create(
+                project=existing,
+                name="Existing",
+                estimation=end - start,
+                is_deleted=False,
+                completed=False,
+            )
+            Assignments.objects.create(
+                task=task,
+                resource=resources[resource_position],
+                start_date=day(start),
+                end_date=day(end),
+                status=status,
+            )
+
+        project = Project.objects.create(
+            name="Project", is_deleted=False, completed=False
+        )
+        for estimation, start, end, skill_positions in self.tasks:
+            task = Task.objects.create(
+                project=project,
+                name="Task",
+                estimation=estimation,
+                start_date=day(start),
+                end_date=day(end),
+                is_deleted=False,
+                completed=False,
+            )
+            task.skills_required.set([skills[i] for i in skill_positions])
+        return project.id
+
+    def reductions(self):
+        """
+        Smaller scenarios, one thing removed or simplified from this one each.
+        """
+        for i in range(len(self.tasks)):
+            yield Scenario(
+                self.skills,
+                self.resources,
+                self.assignments,
+                self.tasks[:i] + self.tasks[i + 1 :],
+            )
+        for i in range(len(self.resources)):
+            yield Scenario(
+                self.skills,
+                self.resources[:i] + self.resources[i + 1 :],
+                [
+                    (position - (position > i), start, end, status)
+                    for position, start, end, status in self.assignments
+                    if position != i
+                ],
+                self.tasks,
+            )
+        for i in range(len(self.assignments)):
+            yield Scenario(
+                self.skills,
+                self.resources,
+                self.assignments[:i] + self.assignments[i + 1 :],
+                self.tasks,
+            )
+        for i, (estimation, start, end, skill_positions) in enumerate(self.tasks):
+            simpler = []
+            if start is not None or end is not None:
+                simpler.append((estimation, None, None, skill_positions))
+            if estimation > 1:
+                simpler.append((1, start, end, skill_positions))
+            if skill_positions:
+                simpler.append((estimation, start, end, skill_positions[1:]))
+            for task in simpler:
+                tasks = copy.copy(self.tasks)
+                tasks[i] = task
+                yield Scenario(self.skills, self.resources, self.assignments, tasks)
+        for i, (start, end, skill_positions) in enumerate(self.resources):
+            simpler = []
+            if end is not None:
+                simpler.append((start, None, skill_positions))
+            if start > 0:
+                simpler.append((0, end, skill_positions))
+            for resource in simpler:
+                resources = copy.copy(self.resources)
+                resources[i] = resource
+                yield Scenario(self.skills, resources, self.assignments, self.tasks)
+
+
+def random_scenario(rnd, max_resources=5, max_tasks=10):
+    skills = rnd.randint(1, 4)
+    resources = []
+    assignments = []
+    for position in range(rnd.randint(1, max_resources)):
+        resources.append(
+            (
+                rnd.randint(-5, 10),
+                rnd.choice([None, rnd.randint(10, 60)]),
+                sorted(rnd.sample(range(skills), rnd.randint(0, skills))),
+            )
+        )
+        # Ongoing and future assignments, one after the other as they cannot
+        # share a day
+        start = rnd.randint(-10, 5)
+        for _ in range(rnd.randint(0, 4)):
+            start += rnd.randint(0, 8)
+            end = start + rnd.randint(0, 6)
+            status = rnd.choice(["ASSIGNED", "ASSIGNED", "COMPLETED"])
+            assignments.append((position, start, end, status))
+            start = end + 1
+
+    tasks = []
+    for _ in range(rnd.randint(1, max_tasks)):
+        start = end = None
+        if rnd.random() < 0.4:
+            start = rnd.randint(-3, 20)
+            end = start + rnd.randint(3, 20)
+        tasks.append(
+            (
+                rnd.randint(0, 5),
+                start,
+                end,
+                sorted(rnd.sample(range(skills), rnd.randint(0, min(2, skills)))),
+            )
+        )
+    return Scenario(skills, resources, assignments, tasks)
+
+
+def unassigned_tasks(project_id):
+    return Task.unassigned_objects.filter(project=project_id).order_by(
+        "start_date", "id"
+    )
+
+
+def reference_engine(project_id):
+    """
+    The greedy of helpers.find_earliest_assignment, storing every assignment
+    before planning the next task as the assign view used to.
+    """
+    planned = []
+    for task in unassigned_tasks(project_id):
+        start_date, end_date, resource_id = find_earliest_assignment(task.id)
+        if not start_date:
+            return planned, task.id
+        Assignments.objects.create(
+            task_id=task.id,
+            resource_id=resource_id,
+            start_date=start_date,
+            end_date=end_date,
+            status="ASSIGNED",
+        )
+        planned.append((task.id, resource_id, start_date, end_date))
+    return planned, None
+
+
+def planner_engine(project_id):
+    planner = Planner()
+    planned = []
+    for task in unassigned_tasks(project_id).prefetch_related("skills_required"):
+        try:
+            assignment = planner.plan_task(task)
+        except PlanningError:
+            return planned, task.id
+        planned.append(
+            (
+                assignment["task_id"],
+                assignment["resource_id"],
+                assignment["start_date"],
+                assignment["end_date"],
+            )
+        )
+    return planned, None
+
+
+def parallel_planner_engine(project_id, workers=2):
+    planner = Planner()
+    tasks = list(unassigned_tasks(project_id).prefetch_related("skills_required"))
+    try:
+        assignments = planner.plan_parallel(planner.partitions(tasks), workers)
+    except PlanningError as e:
+        # Only the failing task is known, what was planned before it is not
+        return None, e.task_id
+    return [
+        (
+            assignment["task_id"],
+            assignment["resource_id"],
+            assignment["start_date"],
+            assignment["end_date"],
+        )
+        for assignment in assignments
+    ], None
+
+
+class Mismatch:
+    def __init__(self, seed, scenario, expected, actual):
+        self.seed = seed
+        self.scenario = scenario
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self):
+        return (
+            f"Engines disagree on seed {self.seed}\n{self.scenario}\n"
+            f"reference: {self.expected}\ncandidate: {self.actual}"
+        )
+
+
+def run_engine(engine, scenario):
+    """
+    Builds the scenario, runs the engine and rolls everything back.
+
+    The ids in the outcome are replaced with positions in the scenario so
+    outcomes of different builds can be compared.
+    """
+    with transaction.atomic():
+        project_id = scenario.build()
+        task_ids = list(
+            Task.objects.filter(project=project_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        resource_ids = list(
+            Resource.objects.order_by("id").values_list("id", flat=True)
+        )
+        planned, failed_task_id = engine(project_id)
+        transaction.set_rollback(True)
+
+    today = date.today()
+    if planned is not None:
+        planned = [
+            (
+                task_ids.index(task_id),
+                resource_ids.index(resource_id),
+                (start_date - today).days,
+                (end_date - today).days,
+            )
+            for task_id, resource_id, start_date, end_date in planned
+        ]
+    failed = None if failed_task_id is None else task_ids.index(failed_task_id)
+    return planned, failed
+
+
+def agree(expected, actual):
+    # Engines failing as a whole only have to fail on the same task
+    if expected[1] is not None or actual[1] is not None:
+        if actual[0] is None or expected[0] is None:
+            return expected[1] == actual[1]
+    return expected == actual
+
+
+def shrink(scenario, candidate, reference=reference_engine):
+    """
+    Removes and simplifies parts of a failing scenario as long as it fails.
+    """
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for smaller in scenario.reductions():
+            if not agree(
+                run_engine(reference, smaller), run_engine(candidate, smaller)
+            ):
+                scenario = smaller
+                shrunk = True
+                break
+    return scenario
+
+
+def differential(candidate, reference=reference_engine, runs=100, seed=0):
+    """
+    Runs both engines on random scenarios and returns the first disagreement,
+    shrunk to the smallest scenario still failing, or None.
+    """
+    for run_seed in range(seed, seed + runs):
+        scenario = random_scenario(random.Random(run_seed))
+        if not agree(run_engine(reference, scenario), run_engine(candidate, scenario)):
+            scenario = shrink(scenario, candidate, reference)
+            return Mismatch(
+                run_seed,
+                scenario,
+                run_engine(reference, scenario),
+                run_engine(candidate, scenario),
+            )
+    return None
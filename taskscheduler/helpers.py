@@ -1,7 +1,16 @@
 import datetime
 from datetime import datetime, timedelta
 
+from taskscheduler.calendars import ResourceCalendar
+from taskscheduler.metrics import ASSIGNMENTS_REJECTED
 from taskscheduler.models import Assignments, Resource, Task
+from taskscheduler.reference_data import reference_data
+
+
+def is_assignment_overlap(error):
+    # Only the exclusion constraint means the resource is already assigned
+    diag = getattr(error.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None) == "assignment_no_overlap"
 
 
 def find_earliest_assignment(task_id, resource_id=None):
@@ -66,8 +75,10 @@ def find_earliest_assignment(task_id, resource_id=None):
             # Find the earliest assignment date with a gap greater than task estimation
             # This finds if an any gap between the resource assignment where the can take it
             for assignment in future_assignments:
+                # The task takes estimation + 1 days as both its dates are
+                # inclusive, so it must end before the next assignment starts
                 if assignment.start_date > prev_assignment_end_date + timedelta(
-                    days=task.estimation
+                    days=task.estimation + 1
                 ):
                     current_earliest_assignment_start_date = (
                         prev_assignment_end_date + timedelta(days=1)
@@ -120,23 +131,58 @@ def find_earliest_assignment(task_id, resource_id=None):
     )
 
 
-def can_assign_resource(resource, task, start_date, end_date, assignment=None):
-    resource = Resource.objects.get(id=resource)
+def load_calendars(resource_ids=None, since=None):
+    assignments = Assignments.objects.filter(status="ASSIGNED")
+    if resource_ids is not None:
+        assignments = assignments.filter(resource__in=resource_ids)
+    if since is not None:
+        assignments = assignments.filter(end_date__gte=since)
+
+    calendars = {}
+    for assignment_id, resource_id, start_date, end_date in assignments.values_list(
+        "id", "resource_id", "start_date", "end_date"
+    ):
+        calendars.setdefault(resource_id, ResourceCalendar()).add(
+            start_date, end_date, assignment_id
+        )
+    return calendars
+
+
+def can_assign_resource(
+    resource, task, start_date, end_date, assignment=None, calendar=None
+):
+    # The resource and its skills come from the process-wide cache
+    resource_id = resource
+    resource = reference_data().resources.get(resource_id)
+    if resource is None:
+        # Added by another process since this one last read the data
+        resource = reference_data(refresh=True).resources.get(resource_id)
+    if resource is None:
+        raise Resource.DoesNotExist(f"Resource {resource_id} does not exist.")
     task = Task.objects.get(id=task)
 
     # Check if the resource has the required skills
-    if not task.skills_required.filter(id__in=resource.skills.all()).exists():
+    if not task.skills_required.filter(id__in=resource.skill_ids).exists():
+        ASSIGNMENTS_REJECTED.labels("skills").inc()
         return False
 
     # Check if the resource is available during the specified start and end dates
     if resource.availability_start_date and resource.availability_start_date > end_date:
+        ASSIGNMENTS_REJECTED.labels("availability").inc()
         return False
     if resource.availability_end_date and resource.availability_end_date < start_date:
+        ASSIGNMENTS_REJECTED.labels("availability").inc()
         return False
 
     # Check if the resource is already assigned during the specified start and end dates
+    if calendar is not None:
+        # A calendar from load_calendars answers without querying the assignments
+        if calendar.overlaps(start_date, end_date, exclude=assignment):
+            ASSIGNMENTS_REJECTED.labels("conflict").inc()
+            return False
+        return True
     existing_assignments = Assignments.objects.filter(
-        resource=resource,
+        resource=resource_id,
         start_date__lte=end_date,
         end_date__gte=start_date,
         status="ASSIGNED",
@@ -144,6 +190,7 @@ def can_assign_resource(resource, task, start_date, end_date, assignment=None):
     if assignment:
         existing_assignments = existing_assignments.exclude(pk=assignment)
     if existing_assignments.exists():
+        ASSIGNMENTS_REJECTED.labels("conflict").inc()
         return False
 
     return True
@@ -0,0 +1,100 @@
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from taskscheduler.models import PlanJob
+
+logger = logging.getLogger()
+
+
+class Heartbeat(threading.Thread):
+    """
+    Bumps the heartbeat of a running job every PLAN_JOB_HEARTBEAT_INTERVAL
+    seconds, however long the job runs it is only given to another worker
+    once the heartbeats stop.
+    """
+
+    def __init__(self, job):
+        super().__init__(daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.PLAN_JOB_HEARTBEAT_INTERVAL):
+                beat(self.job)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def beat(job):
+    # Never waits for a lock on the row, the next beat tries again
+    with transaction.atomic():
+        job_ids = list(
+            PlanJob.objects.select_for_update(skip_locked=True)
+            .filter(id=job.id, status="RUNNING")
+            .values_list("id", flat=True)
+        )
+        PlanJob.objects.filter(id__in=job_ids).update(heartbeat_date=timezone.now())
+
+
+def claim_job():
+    # A running job without a recent heartbeat lost its worker and is retried
+    stale_date = timezone.now() - timedelta(seconds=settings.PLAN_JOB_HEARTBEAT_TIMEOUT)
+    # SKIP LOCKED lets several workers take jobs off the table without a broker
+    with transaction.atomic():
+        job = (
+            PlanJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="QUEUED") | Q(status="RUNNING", heartbeat_date__lt=stale_date)
+            )
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+        if job.status == "RUNNING":
+            logger.warning(f"Job {job.id} timed out, running it again")
+        job.status = "RUNNING"
+        job.started_date = job.heartbeat_date = timezone.now()
+        job.save(update_fields=["status", "started_date", "heartbeat_date"])
+    return job
+
+
+def run_job(job):
+    from taskscheduler.views import AssignmentsCreateView, PlanCreateView
+
+    view = {"PLAN": PlanCreateView, "ASSIGN": AssignmentsCreateView}[job.kind]()
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        response = view.run(job.payload)
+        if isinstance(response, Response):
+            content = JSONRenderer().render(response.data)
+        else:
+            content = response.content
+        job.status_code = response.status_code
+        job.result = json.loads(content)
+        job.status = "DONE" if response.status_code < 400 else "FAILED"
+    except Exception as e:
+        logger.exception(f"Job {job.id} failed", exc_info=True)
+        job.status_code = 500
+        job.result = {"message": "Job failed", "error": str(e)}
+        job.status = "FAILED"
+    finally:
+        heartbeat.stop()
+    job.finished_date = timezone.now()
+    job.save(update_fields=["status", "status_code", "result", "finished_date"])
+    return job
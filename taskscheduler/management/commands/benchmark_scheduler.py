@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from taskscheduler.benchmarks import compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the scheduling path on generated datasets, "
+        "the data is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            type=int,
+            nargs="+",
+            default=[10, 1000, 100000],
+            help="Number of tasks of the generated projects",
+        )
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=20,
+            help="Tasks the per task helpers are called for",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--cases", nargs="+", help="Cases to run, all by default")
+        parser.add_argument("--output", help="File to save the results as JSON")
+        parser.add_argument("--compare", help="Baseline results to compare with")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Slowdown over the baseline flagged as a regression",
+        )
+
+    def handle(self, *args, **options):
+        def report(scale, name, metrics):
+            self.stdout.write(
+                f"{scale} tasks {name}: {metrics['wall_time']:.3f}s, "
+                f"{metrics['queries']} queries in {metrics['sql_time']:.3f}s, "
+                f"{metrics['peak_memory'] / 1024 / 1024:.1f} MiB peak"
+            )
+
+        results = run_benchmarks(
+            options["scales"],
+            sample=options["sample"],
+            seed=options["seed"],
+            cases=options["cases"],
+            report=report,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+            regressions = compare(baseline, results, options["threshold"])
+            for regression in regressions:
+                self.stdout.write(f"Regression: {regression}")
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions over the baseline")
+            self.stdout.write("No regressions over the baseline")
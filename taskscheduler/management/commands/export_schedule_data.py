@@ -0,0 +1,34 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from taskscheduler.planner import read_only_snapshot
+from taskscheduler.schedule_data import (FORMATS, data_path, export_table,
+                                         schedule_models)
+
+
+class Command(BaseCommand):
+    help = "Exports the schedule tables to CSV or JSON lines files with COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory to write one file per table")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument(
+            "--tables", nargs="+", help="Tables to export, all of them by default"
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options["directory"], exist_ok=True)
+        # The tables are exported from one snapshot to keep the foreign keys intact
+        with read_only_snapshot():
+            for model in schedule_models():
+                table = model._meta.db_table
+                if options["tables"] and table not in options["tables"]:
+                    continue
+                started = time.perf_counter()
+                path = data_path(options["directory"], table, options["format"])
+                with open(path, "w", newline="") as stream:
+                    rows = export_table(model, stream, options["format"])
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{table}: {rows} rows exported in {elapsed:.2f}s")
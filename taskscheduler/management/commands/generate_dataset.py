@@ -0,0 +1,62 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from taskscheduler.datasets import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = "Generates a deterministic synthetic schedule for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=10)
+        parser.add_argument("--tasks-per-project", type=int, default=100)
+        parser.add_argument("--resources", type=int, default=50)
+        parser.add_argument("--skills", type=int, default=10)
+        parser.add_argument(
+            "--skill-density",
+            type=float,
+            default=0.3,
+            help="Chance a resource has each of the skills",
+        )
+        parser.add_argument(
+            "--assignment-load",
+            type=float,
+            default=0.2,
+            help="Share of the tasks already assigned",
+        )
+        parser.add_argument(
+            "--date-constraint-ratio",
+            type=float,
+            default=0.1,
+            help="Share of the tasks with a start and end date",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--start-date",
+            type=date.fromisoformat,
+            help="First day of the schedule, today by default",
+        )
+        parser.add_argument("--horizon-days", type=int, default=90)
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        generator = DatasetGenerator(
+            projects=options["projects"],
+            tasks_per_project=options["tasks_per_project"],
+            resources=options["resources"],
+            skills=options["skills"],
+            skill_density=options["skill_density"],
+            assignment_load=options["assignment_load"],
+            date_constraint_ratio=options["date_constraint_ratio"],
+            seed=options["seed"],
+            start_date=options["start_date"],
+            horizon_days=options["horizon_days"],
+            batch_size=options["batch_size"],
+        )
+        for table, rows in generator.generate().items():
+            self.stdout.write(f"{table}: {rows} rows")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Dataset generated in {elapsed:.2f}s")
@@ -0,0 +1,82 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from taskscheduler.schedule_data import (FORMATS, Checkpoint, data_path,
+                                         import_table, schedule_models)
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports the schedule tables from CSV or JSON lines files with COPY, "
+        "rows are inserted or updated by id"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory with one file per table")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument(
+            "--tables", nargs="+", help="Tables to import, all of them by default"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Rows copied and committed at a time",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="File keeping the progress, defaults to .import_checkpoint.json "
+            "in the directory",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and import everything again",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        checkpoint = Checkpoint(
+            options["checkpoint"] or os.path.join(directory, ".import_checkpoint.json")
+        )
+        if options["restart"]:
+            checkpoint.clear()
+
+        started = time.perf_counter()
+
+        def report(table, rows):
+            if options["verbosity"] > 1:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{table}: {rows} rows imported ({elapsed:.2f}s)")
+
+        for model in schedule_models():
+            table = model._meta.db_table
+            if options["tables"] and table not in options["tables"]:
+                continue
+            path = data_path(directory, table, options["format"])
+            if not os.path.exists(path):
+                continue
+            if checkpoint.done(table):
+                self.stdout.write(
+                    f"{table}: resuming after {checkpoint.done(table)} rows"
+                )
+            try:
+                rows = import_table(
+                    model,
+                    path,
+                    options["format"],
+                    checkpoint,
+                    options["batch_size"],
+                    report,
+                )
+            except Exception as e:
+                raise CommandError(
+                    f"{table}: import stopped after {checkpoint.done(table)} rows, "
+                    f"run again to resume: {e}"
+                )
+            self.stdout.write(f"{table}: {rows} rows imported")
+        checkpoint.clear()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Import finished in {elapsed:.2f}s")
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from taskscheduler.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Runs the queued plan and assign jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once the queue is empty"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before looking for new jobs again",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+            self.stdout.write(f"Running {job.kind} job {job.id}")
+            run_job(job)
+            self.stdout.write(f"Job {job.id} {job.status}")
@@ -0,0 +1,128 @@
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+# With PROMETHEUS_MULTIPROC_DIR set every process writes its values to files
+# there and the endpoint adds them up, see gunicorn.conf.py
+REQUEST_DURATION = Histogram(
+    "taskscheduler_request_duration_seconds",
+    "Time to answer a request per route.",
+    ["method", "route"],
+)
+TASKS_PLANNED = Counter("taskscheduler_tasks_planned", "Tasks the planner placed.")
+TASKS_FAILED = Counter(
+    "taskscheduler_tasks_failed", "Tasks the planner could not place."
+)
+FIND_EARLIEST_ASSIGNMENT_DURATION = Histogram(
+    "taskscheduler_find_earliest_assignment_seconds",
+    "Time to find the earliest assignment of a task.",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 1),
+)
+CANDIDATE_RESOURCES = Histogram(
+    "taskscheduler_candidate_resources",
+    "Resources examined to find the earliest assignment of a task.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+ASSIGNMENTS_REJECTED = Counter(
+    "taskscheduler_assignments_rejected",
+    "Assignments can_assign_resource refused per reason.",
+    ["reason"],
+)
+REQUEST_QUERIES = Histogram(
+    "taskscheduler_request_queries",
+    "Queries run by a request per route.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+REQUEST_QUERY_DURATION = Histogram(
+    "taskscheduler_request_query_seconds",
+    "Time a request spent in its queries per route.",
+    ["method", "route"],
+)
+
+
+# What planning adds to, a forked planner worker records it instead
+PLANNER_METRICS = (
+    TASKS_PLANNED,
+    TASKS_FAILED,
+    FIND_EARLIEST_ASSIGNMENT_DURATION,
+    CANDIDATE_RESOURCES,
+    ASSIGNMENTS_REJECTED,
+)
+_worker_records = None
+
+
+class RecordedMetric:
+    def __init__(self, records, index, labels=()):
+        self.records = records
+        self.index = index
+        self.labels = labels
+
+    def with_labels(self, *labels):
+        return RecordedMetric(self.records, self.index, labels)
+
+    def inc(self, amount=1):
+        self.records.append((self.index, self.labels, "inc", amount))
+
+    def observe(self, amount):
+        self.records.append((self.index, self.labels, "observe", amount))
+
+
+def record_worker_metrics():
+    """
+    Initializer of a forked planner worker. Its own metric values would be
+    lost without multiprocess mode, so what it adds to the planner metrics
+    is recorded for the parent to apply with apply_worker_metrics.
+    """
+    global _worker_records
+    _worker_records = []
+    for index, metric in enumerate(PLANNER_METRICS):
+        # The metric objects are the worker's own copies
+        recorded = RecordedMetric(_worker_records, index)
+        metric.inc = recorded.inc
+        metric.observe = recorded.observe
+        metric.labels = recorded.with_labels
+
+
+def take_worker_metrics():
+    records = list(_worker_records)
+    _worker_records.clear()
+    return records
+
+
+def apply_worker_metrics(records):
+    for index, labels, method, amount in records:
+        metric = PLANNER_METRICS[index]
+        if labels:
+            metric = metric.labels(*labels)
+        getattr(metric, method)(amount)
+
+
+def release_worker_metrics(pids):
+    # Like gunicorn.conf.py does for its workers
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        for pid in pids:
+            multiprocess.mark_process_dead(pid)
+
+
+def metrics_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    if not (
+        request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+        or request.user.is_staff
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,152 @@
+import heapq
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from taskscheduler.metrics import (REQUEST_DURATION, REQUEST_QUERIES,
+                                   REQUEST_QUERY_DURATION)
+
+logger = logging.getLogger("taskscheduler.requests")
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting the queries and the time spent in them,
+    keeping the slowest statements when asked to.
+    """
+
+    def __init__(self, slowest=0):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.keep_slowest = slowest
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.sql_time += duration
+            if self.keep_slowest:
+                entry = (duration, self.queries, sql)
+                if len(self._slowest) < self.keep_slowest:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        return [
+            (duration, sql) for duration, _, sql in sorted(self._slowest, reverse=True)
+        ]
+
+
+def record_serialize(request, started):
+    timing = getattr(request, "timing", None)
+    if timing is not None:
+        elapsed = time.perf_counter() - started
+        timing["serialize"] = timing.get("serialize", 0) + elapsed
+
+
+class SerializeTimingMixin:
+    """
+    Adds the time the serializers of a viewset spend building their data to
+    the serialize timing of the request.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        # .data builds its output with to_representation, a list serializer
+        # which many=True returns calls its child's for every item
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            started = time.perf_counter()
+            try:
+                return to_representation(instance)
+            finally:
+                record_serialize(self.request, started)
+
+        serializer.to_representation = timed_to_representation
+        return serializer
+
+
+class RequestTimingMiddleware:
+    """
+    Times the SQL, the view, the serializers and the rendering of every
+    request, the serializers running within the view.
+
+    The timings are sent back in a Server-Timing header, logged as one JSON
+    line on the taskscheduler.requests logger and added to the metrics. What
+    a streaming response runs once returned is not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder(
+            slowest=getattr(settings, "REQUEST_TIMING_SLOWEST_QUERIES", 3)
+        )
+        request.timing = {}
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        match = request.resolver_match
+        labels = (request.method, match.view_name if match else "unmatched")
+        REQUEST_DURATION.labels(*labels).observe(finished - started)
+        REQUEST_QUERIES.labels(*labels).observe(recorder.queries)
+        REQUEST_QUERY_DURATION.labels(*labels).observe(recorder.sql_time)
+
+        timing = request.timing
+        view = timing.get("view_finished", finished) - timing.get(
+            "view_started", started
+        )
+        render = finished - timing["view_finished"] if "view_finished" in timing else 0
+        metrics = [
+            ("sql", recorder.sql_time, f"{recorder.queries} queries"),
+            ("view", view, None),
+            ("serialize", timing.get("serialize", 0), None),
+            ("render", render, None),
+            ("total", finished - started, None),
+        ]
+        if getattr(settings, "REQUEST_TIMING_HEADER", True):
+            response["Server-Timing"] = ", ".join(
+                f"{name};dur={duration * 1000:.1f}"
+                + (f';desc="{description}"' if description else "")
+                for name, duration, description in metrics
+            )
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "queries": recorder.queries,
+                    **{
+                        f"{name}_ms": round(duration * 1000, 2)
+                        for name, duration, _ in metrics
+                    },
+                    "slowest": [
+                        {"ms": round(duration * 1000, 2), "sql": sql[:500]}
+                        for duration, sql in recorder.slowest
+                    ],
+                }
+            )
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing["view_started"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called between the view returning and the DRF response being rendered
+        request.timing["view_finished"] = time.perf_counter()
+        return response
@@ -0,0 +1,67 @@
+# Generated by Django 4.0 on 2026-10-18 04:04
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+OVERLAPPING_ASSIGNMENTS = """
+SELECT a.id, b.id, a.resource_id
+FROM assignment a
+JOIN assignment b
+    ON a.resource_id = b.resource_id AND a.id < b.id AND a.period && b.period
+WHERE a.status = 'ASSIGNED' AND b.status = 'ASSIGNED'
+ORDER BY a.id, b.id
+"""
+
+
+def check_overlapping_assignments(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(OVERLAPPING_ASSIGNMENTS)
+        overlaps = cursor.fetchall()
+    if overlaps:
+        raise RuntimeError(
+            "Cannot add the assignment_no_overlap constraint, these ASSIGNED "
+            "assignments share days on the same resource: "
+            + ", ".join(
+                f"{first_id} and {second_id} (resource {resource_id})"
+                for first_id, second_id, resource_id in overlaps
+            )
+            + ". Move or cancel one of each pair and migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taskscheduler", "0009_alter_resource_skills_alter_task_skills_required"),
+    ]
+
+    operations = [
+        # Needed for the equality on resource_id inside the GiST constraint
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name="assignments",
+            name="period",
+            field=django.contrib.postgres.fields.ranges.DateRangeField(null=True),
+        ),
+        # Both dates are inclusive
+        migrations.RunSQL(
+            "UPDATE assignment SET period = "
+            "daterange(start_date, greatest(end_date, start_date) + 1)",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="assignments",
+            name="period",
+            field=django.contrib.postgres.fields.ranges.DateRangeField(),
+        ),
+        migrations.RunPython(check_overlapping_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="assignments",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(("status", "ASSIGNED")),
+                expressions=[("resource", "="), ("period", "&&")],
+                name="assignment_no_overlap",
+            ),
+        ),
+    ]
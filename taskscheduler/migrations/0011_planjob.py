@@ -0,0 +1,62 @@
+# Generated by Django 4.0 on 2026-10-18 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taskscheduler", "0010_assignments_period"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlanJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("PLAN", "Plan"), ("ASSIGN", "Assign")], max_length=10
+                    ),
+                ),
+                ("payload", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUEUED", "Queued"),
+                            ("RUNNING", "Running"),
+                            ("DONE", "Done"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="QUEUED",
+                        max_length=10,
+                    ),
+                ),
+                ("status_code", models.IntegerField(null=True)),
+                ("result", models.JSONField(null=True)),
+                ("created_date", models.DateTimeField(auto_now_add=True)),
+                ("started_date", models.DateTimeField(null=True)),
+                ("finished_date", models.DateTimeField(null=True)),
+            ],
+            options={
+                "db_table": "plan_job",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="planjob",
+            index=models.Index(
+                condition=models.Q(("status", "QUEUED")),
+                fields=["id"],
+                name="plan_job_queued_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0 on 2026-10-18 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("taskscheduler", "0012_reference_data_cache_table"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="planjob",
+            name="heartbeat_date",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -1,4 +1,9 @@
+from datetime import timedelta
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
 from django.db import models
+from psycopg2.extras import DateRange
 
 
 class ProjectManager(models.Manager):
@@ -92,7 +97,64 @@ class Assignments(models.Model):
     )
     start_date = models.DateField(null=False)
     end_date = models.DateField(null=False)
+    # [start_date, end_date + 1) kept in sync on save for the overlap
+    # constraint, as both dates are inclusive
+    period = DateRangeField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
 
     class Meta:
         db_table = "assignment"
+        constraints = [
+            ExclusionConstraint(
+                name="assignment_no_overlap",
+                expressions=[
+                    ("resource", RangeOperators.EQUAL),
+                    ("period", RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(status="ASSIGNED"),
+            ),
+        ]
+
+    @staticmethod
+    def date_range(start_date, end_date):
+        to_date = models.DateField().to_python
+        start_date, end_date = to_date(start_date), to_date(end_date)
+        return DateRange(start_date, max(end_date, start_date) + timedelta(days=1))
+
+    def save(self, *args, **kwargs):
+        self.period = self.date_range(self.start_date, self.end_date)
+        super().save(*args, **kwargs)
+
+
+class PlanJob(models.Model):
+    KIND_CHOICES = [
+        ("PLAN", "Plan"),
+        ("ASSIGN", "Assign"),
+    ]
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="QUEUED")
+    # Status code and body of the response the request would have returned
+    status_code = models.IntegerField(null=True)
+    result = models.JSONField(null=True)
+    created_date = models.DateTimeField(auto_now_add=True)
+    started_date = models.DateTimeField(null=True)
+    # Bumped by the worker while it runs the job
+    heartbeat_date = models.DateTimeField(null=True)
+    finished_date = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = "plan_job"
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="plan_job_queued_idx",
+                condition=models.Q(status="QUEUED"),
+            ),
+        ]
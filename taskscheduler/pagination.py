@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key.
+
+    The cursor holds the last id seen so every page is an index seek on id
+    instead of an OFFSET scan, and stays stable while rows are added.
+    """
+
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
@@ -0,0 +1,578 @@
+import copy
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+
+from taskscheduler.calendars import ResourceCalendar
+from taskscheduler.helpers import load_calendars
+from taskscheduler.metrics import (ASSIGNMENTS_REJECTED, CANDIDATE_RESOURCES,
+                                   FIND_EARLIEST_ASSIGNMENT_DURATION,
+                                   TASKS_FAILED, TASKS_PLANNED,
+                                   apply_worker_metrics, record_worker_metrics,
+                                   release_worker_metrics, take_worker_metrics)
+from taskscheduler.models import Assignments, Task
+from taskscheduler.reference_data import reference_data
+from taskscheduler.skills import SkillIndex
+from taskscheduler.tracing import PlanTrace
+
+
+class PlanningError(Exception):
+    def __init__(self, task_id, message):
+        super().__init__(message)
+        self.task_id = task_id
+
+
+def plan_partition(planner, tasks):
+    # Runs in a worker process, errors are returned as they have to be pickled
+    # and so are the metrics and trace events for the parent to apply
+    if planner.trace is not None:
+        planner.trace = planner.trace.deferred()
+    planned = []
+    error = None
+    for position, task in tasks:
+        try:
+            planned.append((position, planner.plan_task(task)))
+        except PlanningError as e:
+            error = (position, e.task_id, str(e))
+            break
+    events = planner.trace.events if planner.trace is not None else []
+    return (
+        planned,
+        planner.new_assignments,
+        error,
+        (os.getpid(), take_worker_metrics(), events),
+    )
+
+
+def iter_tasks(queryset, chunk_size=2000):
+    # iterator() ignores prefetch_related on Django 4.0 so skills are fetched per chunk
+    chunk = []
+    for task in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(task)
+        if len(chunk) == chunk_size:
+            prefetch_related_objects(chunk, "skills_required")
+            yield from chunk
+            chunk = []
+    prefetch_related_objects(chunk, "skills_required")
+    yield from chunk
+
+
+@contextmanager
+def read_only_snapshot():
+    """
+    Runs the planner queries in one read only repeatable read transaction so
+    they see the same state without taking locks or writing anything.
+    """
+    if connection.in_atomic_block:
+        # Too late to change the isolation of an outer transaction
+        yield
+        return
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        yield
+
+
+class ResourceSchedule:
+    def __init__(self, resource, calendar=None, since=None):
+        self.id = resource.id
+        self.availability_start_date = resource.availability_start_date
+        self.availability_end_date = resource.availability_end_date
+        self.since = since
+        self._calendar = calendar
+
+    @property
+    def calendar(self):
+        if self._calendar is None:
+            # Read on first use unless the planner read every calendar at once
+            calendars = load_calendars(resource_ids=[self.id], since=self.since)
+            self._calendar = calendars.get(self.id, ResourceCalendar())
+        return self._calendar
+
+    @calendar.setter
+    def calendar(self, calendar):
+        self._calendar = calendar
+
+    @property
+    def calendar_loaded(self):
+        return self._calendar is not None
+
+    def can_take(self, task):
+        return (
+            task.start_date is None or self.availability_start_date <= task.start_date
+        ) and (
+            task.end_date is None
+            or self.availability_end_date is None
+            or self.availability_end_date >= task.end_date
+        )
+
+
+class Planner:
+    """
+    Schedules tasks with the same greedy rules as `find_earliest_assignment`
+    but against resource calendars loaded once and kept in memory.
+    """
+
+    def __init__(self, today=None, trace=None):
+        self.today = today or datetime.now().date()
+        # Runs are traced when sampled unless a PlanTrace is given
+        self.trace = trace if trace is not None else PlanTrace.sample()
+        self.resources = {}
+        self.planned = set()
+        self.new_assignments = []
+        self.released_assignments = []
+        self.refreshed_resources = None
+        self.reset_memo()
+        self.load()
+
+    def load(self):
+        # Resources and their skills come from the process-wide cache, the
+        # calendars are read once a task needs them
+        resources = reference_data().resources
+        self.skill_index = SkillIndex()
+        self.calendars_loaded = False
+        for resource in resources.values():
+            self.skill_index.set_resource_skills(resource.id, resource.skill_ids)
+            # Assignments which ended before today can never block a planned one
+            self.resources[resource.id] = ResourceSchedule(resource, since=self.today)
+
+    def load_all_calendars(self):
+        """
+        Reads the calendars not read yet in one query, before planning tasks
+        which may go to any resource.
+        """
+        if self.calendars_loaded:
+            return
+        pending = [
+            resource
+            for resource in self.resources.values()
+            if not resource.calendar_loaded
+        ]
+        resource_ids = None
+        if len(pending) < len(self.resources):
+            resource_ids = [resource.id for resource in pending]
+        calendars = load_calendars(resource_ids=resource_ids, since=self.today)
+        for resource in pending:
+            resource.calendar = calendars.get(resource.id, ResourceCalendar())
+        self.calendars_loaded = True
+
+    def load_resource(self, resource_id):
+        """
+        Loads a resource missing from the reference data the planner started
+        with, it may have been added by another process since.
+
+        Returns False when the resource does not exist.
+        """
+        if resource_id in self.resources:
+            return True
+        # Read again at most once per run
+        if self.refreshed_resources is None:
+            self.refreshed_resources = reference_data(refresh=True).resources
+        resource = self.refreshed_resources.get(resource_id)
+        if resource is None:
+            return False
+        self.skill_index.set_resource_skills(resource.id, resource.skill_ids)
+        self.resources[resource.id] = ResourceSchedule(resource, since=self.today)
+        # The new resource is a candidate for the lookups memoized without it
+        self.reset_memo()
+        return True
+
+    @staticmethod
+    def load_tasks(task_ids):
+        tasks = Task.objects.prefetch_related("skills_required").in_bulk(task_ids)
+        return [tasks[task_id] for task_id in task_ids]
+
+    def candidates(self, task, resource_id=None):
+        skills_required = self.skill_index.task_mask(task)
+        if resource_id is not None:
+            if not self.skill_index.has_skills(resource_id, skills_required):
+                return []
+            return [self.resources[resource_id]]
+        return [
+            self.resources[candidate_id]
+            for candidate_id in self.skill_index.candidates(skills_required)
+        ]
+
+    def eligible_resources(self, task, resource_id=None):
+        # Skills and availability windows do not change during a run
+        key = (
+            self.skill_index.task_mask(task),
+            resource_id,
+            task.start_date,
+            task.end_date,
+        )
+        if key not in self.eligible_memo:
+            self.eligible_memo[key] = [
+                resource
+                for resource in self.candidates(task, resource_id)
+                if resource.can_take(task)
+            ]
+        return self.eligible_memo[key]
+
+    def earliest_start(self, resource, task):
+        start_date = self.today + timedelta(days=1)
+        if task.start_date is not None:
+            start_date = max(start_date, task.start_date)
+        gaps = self.gap_memo.setdefault(resource.id, {})
+        key = (start_date, task.estimation)
+        if key not in gaps:
+            gaps[key] = resource.calendar.find_gap(start_date, task.estimation + 1)
+        return gaps[key]
+
+    def reset_memo(self):
+        """
+        Forgets the lookups memoized for the current calendars.
+
+        Assignments found are memoized per task shape, the skills, dates and
+        estimation, and gaps per resource, start and estimation. Both are
+        dropped for a resource as soon as its calendar changes.
+        """
+        self.eligible_memo = {}
+        self.assignment_memo = {}
+        self.memo_dependents = {}
+        self.gap_memo = {}
+
+    def invalidate(self, resource_id):
+        self.gap_memo.pop(resource_id, None)
+        for key in self.memo_dependents.pop(resource_id, ()):
+            self.assignment_memo.pop(key, None)
+
+    @staticmethod
+    def earliest_assignment(task, start_date, resource_id):
+        if start_date is None:
+            return None, None, None
+        return start_date, start_date + timedelta(days=task.estimation), resource_id
+
+    @FIND_EARLIEST_ASSIGNMENT_DURATION.time()
+    def find_earliest_assignment(self, task, resource_id=None):
+        if resource_id is None:
+            self.load_all_calendars()
+        if self.trace is not None:
+            return self.traced_earliest_assignment(task, resource_id)
+        key = (
+            self.skill_index.task_mask(task),
+            resource_id,
+            task.start_date,
+            task.end_date,
+            task.estimation,
+        )
+        if key in self.assignment_memo:
+            return self.assignment_memo[key]
+
+        earliest_assignment_start_date = None
+        earliest_resource_id = None
+        eligible = self.eligible_resources(task, resource_id)
+        CANDIDATE_RESOURCES.observe(len(eligible))
+        for resource in eligible:
+            start_date = self.earliest_start(resource, task)
+            if (
+                earliest_assignment_start_date is None
+                or start_date < earliest_assignment_start_date
+            ):
+                earliest_assignment_start_date = start_date
+                earliest_resource_id = resource.id
+
+        assignment = self.earliest_assignment(
+            task, earliest_assignment_start_date, earliest_resource_id
+        )
+        self.assignment_memo[key] = assignment
+        for resource in eligible:
+            self.memo_dependents.setdefault(resource.id, set()).add(key)
+        return assignment
+
+    def traced_earliest_assignment(self, task, resource_id=None):
+        # Skips the assignment memo so every step of the search is measured
+        task_trace = self.trace.start_task(task)
+        earliest_assignment_start_date = None
+        earliest_resource_id = None
+        candidates = self.candidates(task, resource_id)
+        CANDIDATE_RESOURCES.observe(len(candidates))
+        task_trace.found_candidates(candidates, len(self.resources))
+        for resource in candidates:
+            if not resource.can_take(task):
+                task_trace.prune(resource)
+                continue
+            task_trace.lap("availability")
+            start_date = self.earliest_start(resource, task)
+            task_trace.searched_gap()
+            if (
+                earliest_assignment_start_date is None
+                or start_date < earliest_assignment_start_date
+            ):
+                earliest_assignment_start_date = start_date
+                earliest_resource_id = resource.id
+
+        assignment = self.earliest_assignment(
+            task, earliest_assignment_start_date, earliest_resource_id
+        )
+        task_trace.finish(*assignment)
+        return assignment
+
+    def can_assign_resource(
+        self, resource_id, task, start_date, end_date, check_conflicts=True
+    ):
+        resource = self.resources[resource_id]
+
+        # Check if the resource has any of the required skills
+        if not (
+            self.skill_index.task_mask(task)
+            & self.skill_index.resource_masks[resource_id]
+        ):
+            ASSIGNMENTS_REJECTED.labels("skills").inc()
+            return False
+
+        if resource.availability_start_date > end_date:
+            ASSIGNMENTS_REJECTED.labels("availability").inc()
+            return False
+        if (
+            resource.availability_end_date
+            and resource.availability_end_date < start_date
+        ):
+            ASSIGNMENTS_REJECTED.labels("availability").inc()
+            return False
+
+        if check_conflicts and resource.calendar.overlaps(start_date, end_date):
+            ASSIGNMENTS_REJECTED.labels("conflict").inc()
+            return False
+        return True
+
+    def place(self, task, resource_id, start_date, end_date):
+        if (task.id, resource_id) in self.planned:
+            raise PlanningError(
+                task.id, f"Task {task.id} is already assigned to the resource."
+            )
+        self.planned.add((task.id, resource_id))
+        self.resources[resource_id].calendar.add(start_date, end_date)
+        self.invalidate(resource_id)
+        self.new_assignments.append(
+            Assignments(
+                task_id=task.id,
+                resource_id=resource_id,
+                start_date=start_date,
+                end_date=end_date,
+                period=Assignments.date_range(start_date, end_date),
+                status="ASSIGNED",
+            )
+        )
+        return {
+            "task_id": task.id,
+            "resource_id": resource_id,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+
+    def plan_task(self, task, resource_id=None):
+        if resource_id is not None and not self.load_resource(resource_id):
+            raise PlanningError(task.id, f"Resource {resource_id} does not exist.")
+        start_date, end_date, resource_id = self.find_earliest_assignment(
+            task, resource_id
+        )
+        if not start_date or not end_date or not resource_id:
+            TASKS_FAILED.inc()
+            raise PlanningError(task.id, f"Task {task.id} could not be scheduled.")
+        planned_assignment = self.place(task, resource_id, start_date, end_date)
+        TASKS_PLANNED.inc()
+        return planned_assignment
+
+    def assign_task(
+        self, task, resource_id, start_date, end_date, check_conflicts=True
+    ):
+        if not self.load_resource(resource_id):
+            raise PlanningError(task.id, f"Resource {resource_id} does not exist.")
+        if not self.can_assign_resource(
+            resource_id, task, start_date, end_date, check_conflicts
+        ):
+            raise PlanningError(
+                task.id, f"Cannot Task {task.id} to the resource {resource_id}."
+            )
+        return self.place(task, resource_id, start_date, end_date)
+
+    def plan(self, tasks):
+        tasks = list(tasks)
+        workers = getattr(settings, "PLANNER_WORKERS", 1)
+        if workers > 1 and len(tasks) >= getattr(
+            settings, "PLANNER_PARALLEL_MIN_TASKS", 1000
+        ):
+            partitions = self.partitions(tasks)
+            if len(partitions) > 1:
+                return self.plan_parallel(partitions, workers)
+        return [self.plan_task(task) for task in tasks]
+
+    def iter_plan(self, tasks):
+        for task in tasks:
+            yield self.plan_task(task)
+
+    def partitions(self, tasks):
+        """
+        Splits the tasks into groups which can not compete for a resource, a
+        task joins every resource having its skills into the same group.
+        """
+        parents = {resource_id: resource_id for resource_id in self.resources}
+
+        def find(resource_id):
+            while parents[resource_id] != resource_id:
+                parents[resource_id] = parents[parents[resource_id]]
+                resource_id = parents[resource_id]
+            return resource_id
+
+        task_candidates = []
+        for task in tasks:
+            candidate_ids = self.skill_index.candidates(
+                self.skill_index.task_mask(task)
+            )
+            for candidate_id in candidate_ids[1:]:
+                parents[find(candidate_id)] = find(candidate_ids[0])
+            task_candidates.append(candidate_ids)
+
+        # Tasks nobody can take end up in a group without resources
+        partitions = {}
+        for position, (task, candidate_ids) in enumerate(zip(tasks, task_candidates)):
+            root = find(candidate_ids[0]) if candidate_ids else None
+            partitions.setdefault(root, ([], []))[1].append((position, task))
+        for resource_id in self.resources:
+            root = find(resource_id)
+            if root in partitions:
+                partitions[root][0].append(resource_id)
+        return list(partitions.values())
+
+    def subplanner(self, resource_ids):
+        planner = copy.copy(self)
+        planner.resources = {
+            resource_id: self.resources[resource_id] for resource_id in resource_ids
+        }
+        planner.planned = set()
+        planner.new_assignments = []
+        planner.released_assignments = []
+        planner.reset_memo()
+        return planner
+
+    def plan_parallel(self, partitions, workers):
+        # Forked workers only compute, they never touch the database connection
+        self.load_all_calendars()
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(partitions)),
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=record_worker_metrics,
+        ) as executor:
+            results = list(
+                executor.map(
+                    plan_partition,
+                    [self.subplanner(resource_ids) for resource_ids, _ in partitions],
+                    [tasks for _, tasks in partitions],
+                )
+            )
+
+        pids = set()
+        for _, _, _, (pid, metrics, events) in results:
+            pids.add(pid)
+            apply_worker_metrics(metrics)
+            for event in events:
+                self.trace.emit(event)
+        release_worker_metrics(pids)
+
+        # Planning stops at the first task which fails, like the sequential plan
+        errors = [error for _, _, error, _ in results if error is not None]
+        if errors:
+            _, task_id, message = min(errors)
+            raise PlanningError(task_id, message)
+
+        planned = sorted(
+            (
+                (position, planned_assignment)
+                for partition_planned, _, _, _ in results
+                for position, planned_assignment in partition_planned
+            ),
+            key=lambda item: item[0],
+        )
+        for _, new_assignments, _, _ in results:
+            for assignment in new_assignments:
+                self.planned.add((assignment.task_id, assignment.resource_id))
+                self.resources[assignment.resource_id].calendar.add(
+                    assignment.start_date, assignment.end_date
+                )
+                self.invalidate(assignment.resource_id)
+                self.new_assignments.append(assignment)
+        return [planned_assignment for _, planned_assignment in planned]
+
+    def plan_projects(self, projects):
+        """
+        Plans the unassigned tasks of several projects against the same
+        calendars. `projects` are (project_id, priority) pairs, projects with a
+        higher priority go first and equal priorities keep the given order.
+        """
+        project_order = {
+            project_id: (-priority, position)
+            for position, (project_id, priority) in enumerate(projects)
+        }
+        unassigned_tasks = (
+            Task.unassigned_objects.filter(project__in=project_order)
+            .order_by("start_date", "id")
+            .prefetch_related("skills_required")
+        )
+        tasks = sorted(
+            unassigned_tasks, key=lambda task: project_order[task.project_id]
+        )
+        return [
+            dict(planned_assignment, project_id=task.project_id)
+            for planned_assignment, task in zip(self.plan(tasks), tasks)
+        ]
+
+    def release(self, assignment):
+        self.resources[assignment.resource_id].calendar.remove(assignment.id)
+        self.invalidate(assignment.resource_id)
+        self.released_assignments.append(assignment)
+
+    def replan(self, task_id=None, resource_id=None, since=None):
+        """
+        Plans again only what a change can affect: the changed task and the
+        assignments of the changed resource which start on or after `since`.
+        Assignments which already started are never moved.
+        """
+        tomorrow = self.today + timedelta(days=1)
+        since = max(since or tomorrow, tomorrow)
+        task_ids = []
+        if task_id is not None:
+            assignment = Assignments.objects.filter(
+                task=task_id, status="ASSIGNED"
+            ).first()
+            if assignment is None:
+                task_ids.append(task_id)
+            elif assignment.start_date >= since:
+                # The task and everything queued after it on its resource
+                resource_id = assignment.resource_id
+                since = assignment.start_date
+
+        assignments = []
+        if resource_id is not None:
+            assignments = list(
+                Assignments.objects.filter(
+                    resource=resource_id, status="ASSIGNED", start_date__gte=since
+                )
+            )
+            task_ids.extend(assignment.task_id for assignment in assignments)
+
+        tasks = list(
+            Task.objects.filter(id__in=task_ids, completed=False)
+            .order_by("start_date", "id")
+            .prefetch_related("skills_required")
+        )
+        # Only assignments which are planned again can be released
+        replanned = {task.id for task in tasks}
+        for assignment in assignments:
+            if assignment.task_id in replanned:
+                self.release(assignment)
+        return self.plan(tasks)
+
+    def commit(self):
+        Assignments.objects.filter(
+            id__in=[assignment.id for assignment in self.released_assignments]
+        ).delete()
+        Assignments.objects.bulk_create(self.new_assignments)
+        self.released_assignments = []
+        self.new_assignments = []
@@ -0,0 +1,186 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connection
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from taskscheduler.middleware import QueryRecorder
+
+
+def profile_dir():
+    return settings.PROFILE_DIR
+
+
+def profile_path(profile_id, extension):
+    return os.path.join(profile_dir(), f"{profile_id}.{extension}")
+
+
+def profiling_requested(request):
+    # The cheap checks come first so requests without the flag pay nothing
+    return (
+        request.query_params.get("profile") == "1"
+        or request.headers.get("X-Profile") == "1"
+    ) and request.user.is_staff
+
+
+def location(function):
+    filename, lineno, name = function
+    return f"{filename}:{lineno}({name})"
+
+
+def hot_functions(profile, limit, callers=3):
+    """
+    The functions the request spent the most time in, with their own time and
+    the callers most of that time came through. cProfile only knows
+    functions, the line numbers are where they are defined.
+    """
+    stats = pstats.Stats(profile)
+    rows = []
+    for function, (
+        _,
+        ncalls,
+        tottime,
+        cumtime,
+        function_callers,
+    ) in stats.stats.items():
+        top_callers = sorted(
+            function_callers.items(), key=lambda item: item[1][3], reverse=True
+        )[:callers]
+        rows.append(
+            {
+                "location": location(function),
+                "calls": ncalls,
+                "own_time": round(tottime, 6),
+                "cumulative_time": round(cumtime, 6),
+                "callers": [
+                    {
+                        "location": location(caller),
+                        "calls": caller_ncalls,
+                        "cumulative_time": round(caller_cumtime, 6),
+                    }
+                    for caller, (_, caller_ncalls, _, caller_cumtime) in top_callers
+                ],
+            }
+        )
+    rows.sort(key=lambda row: row["cumulative_time"], reverse=True)
+    return rows[:limit]
+
+
+def prune_profiles(keep):
+    # The oldest profiles go first, a profile is its .json and .prof files
+    summaries = sorted(
+        (entry for entry in os.scandir(profile_dir()) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime_ns,
+    )
+    for entry in summaries[: max(len(summaries) - keep, 0)]:
+        profile_id = entry.name.removesuffix(".json")
+        for extension in ("json", "prof"):
+            try:
+                os.remove(profile_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+
+class RequestProfiler:
+    """
+    Runs cProfile and records the queries from start to stop, then saves the
+    raw profile as <id>.prof for pstats or snakeviz and a summary as <id>.json.
+    """
+
+    def __init__(self):
+        self.id = str(uuid.uuid4())
+        self.profile = cProfile.Profile()
+        self.recorder = QueryRecorder(slowest=settings.PROFILE_SLOWEST_QUERIES)
+        self.stack = ExitStack()
+
+    def start(self):
+        self.stack.enter_context(connection.execute_wrapper(self.recorder))
+        self.started = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.duration = time.perf_counter() - self.started
+        self.stack.close()
+
+    def save(self, request, response):
+        os.makedirs(profile_dir(), exist_ok=True)
+        self.profile.dump_stats(profile_path(self.id, "prof"))
+        summary = {
+            "id": self.id,
+            "method": request.method,
+            "path": request.path,
+            "user": request.user.get_username(),
+            "status": response.status_code,
+            "duration": round(self.duration, 6),
+            "queries": self.recorder.queries,
+            "sql_time": round(self.recorder.sql_time, 6),
+            "slowest_queries": [
+                {"duration": round(duration, 6), "sql": sql}
+                for duration, sql in self.recorder.slowest
+            ],
+            "hot_functions": hot_functions(
+                self.profile, settings.PROFILE_HOT_FUNCTIONS
+            ),
+        }
+        with open(profile_path(self.id, "json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        prune_profiles(settings.PROFILE_KEEP)
+        return summary
+
+
+class ProfileMixin:
+    """
+    Profiles the handler of a staff request made with ?profile=1 or an
+    X-Profile: 1 header. The response links to the saved profile in an
+    X-Profile header.
+    """
+
+    profiler = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if profiling_requested(request):
+            self.profiler = RequestProfiler()
+            self.profiler.start()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler.save(request, response)
+            response["X-Profile"] = reverse("profile-detail", args=[self.profiler.id])
+            self.profiler = None
+        return response
+
+
+class ProfileView(APIView):
+    """
+    The summary of a saved profile, or with ?download=1 the raw profile.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        path = profile_path(str(profile_id), "json")
+        if not os.path.exists(path):
+            raise Http404
+        if request.query_params.get("download") == "1":
+            return FileResponse(
+                open(profile_path(str(profile_id), "prof"), "rb"),
+                as_attachment=True,
+                filename=f"{profile_id}.prof",
+            )
+        with open(path) as f:
+            return Response(json.load(f))
@@ -0,0 +1,195 @@
+import time
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q, Value
+from django.shortcuts import get_object_or_404
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from taskscheduler.middleware import record_serialize
+
+# Fields whose database value is already what the serializer would output
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.ModelField,
+    serializers.ReadOnlyField,
+    PrimaryKeyRelatedField,
+)
+# Fields needing their to_representation, the dates are formatted as DRF does
+FORMATTED_FIELDS = (
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.DecimalField,
+    serializers.TimeField,
+)
+
+
+class Projection:
+    """
+    The output of a ModelSerializer built from values() rows.
+
+    The columns and formatters are worked out once from the serializer fields,
+    so a row is turned into its representation without creating the model
+    instance or the serializer. Many to many ids are aggregated with ArrayAgg.
+    """
+
+    def __init__(self, serializer_class, field_names=None):
+        model = serializer_class.Meta.model
+        # The primary key is always read as the cursor pagination orders on it
+        self.columns = [model._meta.pk.attname]
+        self.expressions = {}
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field_names is not None and name not in field_names:
+                continue
+            if isinstance(field, ManyRelatedField):
+                key = f"{field.source}_ids"
+                self.expressions[key] = ArrayAgg(
+                    field.source,
+                    filter=Q(**{f"{field.source}__isnull": False}),
+                    ordering=field.source,
+                    default=Value([]),
+                )
+                self.fields.append((name, key, None))
+            elif isinstance(field, FORMATTED_FIELDS):
+                key = model._meta.get_field(field.source).attname
+                self.add_column(key)
+                self.fields.append((name, key, field.to_representation))
+            elif isinstance(field, PLAIN_FIELDS):
+                key = model._meta.get_field(field.source).attname
+                self.add_column(key)
+                self.fields.append((name, key, None))
+            else:
+                raise ValueError(
+                    f"{name} of {serializer_class.__name__} cannot be projected"
+                )
+
+    def add_column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def queryset(self, queryset):
+        return queryset.prefetch_related(None).values(*self.columns, **self.expressions)
+
+    def project(self, row):
+        data = {}
+        for name, key, formatter in self.fields:
+            value = row[key]
+            if formatter is not None and value is not None:
+                value = formatter(value)
+            data[name] = value
+        return data
+
+
+class SparseFieldsMixin:
+    """
+    Narrows GET responses to the ?fields= given or without the ?omit= ones.
+
+    Only the columns of the fields kept are selected, views should check
+    wants_field before prefetching a relation.
+    """
+
+    def get_field_names(self):
+        if not hasattr(self, "_field_names"):
+            self._field_names = None
+            if self.request is not None and self.request.method == "GET":
+                fields = self.request.query_params.get("fields")
+                omit = self.request.query_params.get("omit")
+                if fields or omit:
+                    names = [
+                        name
+                        for name, field in self.get_serializer_class()().fields.items()
+                        if not field.write_only
+                    ]
+                    if fields:
+                        names = [name for name in names if name in fields.split(",")]
+                    if omit:
+                        names = [name for name in names if name not in omit.split(",")]
+                    self._field_names = tuple(names)
+        return self._field_names
+
+    def wants_field(self, name):
+        field_names = self.get_field_names()
+        return field_names is None or name in field_names
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        field_names = self.get_field_names()
+        if field_names is not None:
+            fields = getattr(serializer, "child", serializer).fields
+            for name in list(fields):
+                if not fields[name].write_only and name not in field_names:
+                    fields.pop(name)
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        field_names = self.get_field_names()
+        if field_names is not None:
+            model = queryset.model
+            columns = [model._meta.pk.name]
+            fields = self.get_serializer_class()().fields
+            for name in field_names:
+                try:
+                    model_field = model._meta.get_field(fields[name].source)
+                except FieldDoesNotExist:
+                    continue
+                if model_field.concrete and not model_field.many_to_many:
+                    columns.append(model_field.name)
+            queryset = queryset.only(*columns)
+        return queryset
+
+
+class ProjectionMixin(SparseFieldsMixin):
+    """
+    Serves list and retrieve from a Projection when API_FAST_SERIALIZATION is on.
+    """
+
+    # Keyed by serializer and sparse fieldset, so bounded by the field subsets
+    _projections = {}
+
+    def use_projection(self):
+        return getattr(settings, "API_FAST_SERIALIZATION", False)
+
+    def get_projection(self):
+        key = (self.get_serializer_class(), self.get_field_names())
+        if key not in self._projections:
+            self._projections[key] = Projection(*key)
+        return self._projections[key]
+
+    def get_projected_queryset(self):
+        return self.get_projection().queryset(self.filter_queryset(self.get_queryset()))
+
+    def project_rows(self, rows):
+        started = time.perf_counter()
+        projection = self.get_projection()
+        data = [projection.project(row) for row in rows]
+        record_serialize(self.request, started)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_projection():
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_projected_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.project_rows(page))
+        return Response(self.project_rows(list(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_projection():
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_projected_queryset(),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        return Response(self.project_rows([row])[0])
@@ -0,0 +1,119 @@
+import threading
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from taskscheduler.models import Resource, Skill
+
+VERSION_KEY = "taskscheduler:reference_data:version"
+
+ReferenceResource = namedtuple(
+    "ReferenceResource",
+    ["id", "availability_start_date", "availability_end_date", "skill_ids"],
+)
+
+# The reference data last read in this process
+_cached = None
+# What the current transaction read after changing the reference data, with
+# the commit hooks of those changes it is valid for
+_changes = threading.local()
+
+
+class ReferenceData:
+    """
+    Skill rows and every resource's skills and availability window, read
+    once per version of the reference data.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.skills = dict(Skill.objects.order_by("id").values_list("id", "name"))
+        skill_ids = {}
+        for resource_id, skill_id in Resource.skills.through.objects.order_by(
+            "id"
+        ).values_list("resource_id", "skill_id"):
+            skill_ids.setdefault(resource_id, []).append(skill_id)
+        self.resources = {
+            resource_id: ReferenceResource(
+                resource_id,
+                availability_start_date,
+                availability_end_date,
+                tuple(skill_ids.get(resource_id, ())),
+            )
+            for resource_id, availability_start_date, availability_end_date in (
+                Resource.objects.order_by("id").values_list(
+                    "id", "availability_start_date", "availability_end_date"
+                )
+            )
+        }
+
+
+def version_cache():
+    return caches[settings.REFERENCE_DATA_CACHE]
+
+
+def current_version():
+    cache = version_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(
+            VERSION_KEY, uuid.uuid4().hex, timeout=settings.REFERENCE_DATA_TIMEOUT
+        )
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    version_cache().set(
+        VERSION_KEY, uuid.uuid4().hex, timeout=settings.REFERENCE_DATA_TIMEOUT
+    )
+
+
+def changes_committed():
+    _changes.snapshot = None
+    bump_version()
+
+
+def pending_changes():
+    # Django drops the hooks of a rolled back transaction or savepoint
+    return [hook for hook in connection.run_on_commit if hook[1] is changes_committed]
+
+
+def invalidate_reference_data():
+    bump_version()
+    if connection.in_atomic_block:
+        # Other processes may read the old data under the new version until
+        # the commit, so it is bumped again then
+        transaction.on_commit(changes_committed)
+
+
+def reference_data(refresh=False):
+    """
+    The reference data for the current version, read from the database only
+    when it changed since this process last read it.
+
+    The version is read before the data so the data cached under a version
+    is never older than the version. refresh reads the data again anyway,
+    for a lookup missing a row another process may have added before the
+    version it bumped reached this one.
+    """
+    global _cached
+    hooks = pending_changes()
+    if hooks:
+        # Kept until the transaction changes the data again or rolls back
+        # any of its changes
+        if (
+            refresh
+            or getattr(_changes, "snapshot", None) is None
+            or _changes.hooks != hooks
+        ):
+            _changes.snapshot = ReferenceData(None)
+            _changes.hooks = hooks
+        return _changes.snapshot
+    version = current_version()
+    if refresh or _cached is None or _cached.version != version:
+        _cached = ReferenceData(version)
+    return _cached
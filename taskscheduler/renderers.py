@@ -0,0 +1,39 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON, one object per line.
+
+    Lists are written one item per line so they can also be streamed with
+    render_rows as the items are produced.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, list):
+            data = [data]
+        return b"".join(self.render_rows(data))
+
+    def render_line(self, item):
+        return (
+            json.dumps(
+                item,
+                cls=encoders.JSONEncoder,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode()
+            + b"\n"
+        )
+
+    def render_rows(self, rows):
+        for row in rows:
+            yield self.render_line(row)
@@ -0,0 +1,252 @@
+import csv
+import io
+import json
+import os
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from taskscheduler.models import Assignments, Project, Resource, Skill, Task
+from taskscheduler.reference_data import invalidate_reference_data
+
+FORMATS = ("csv", "jsonl")
+# COPY csv with control characters as quote and delimiter passes JSON lines as is
+JSONL_OPTIONS = "FORMAT csv, QUOTE e'\\x01', DELIMITER e'\\x02'"
+# An explicit null marker keeps empty strings apart from nulls in csv files
+CSV_NULL = "\\N"
+CSV_OPTIONS = f"FORMAT csv, NULL '{CSV_NULL}'"
+# Columns filled from the others when the import does not carry them
+DERIVED_COLUMNS = {
+    ("assignment", "period"): (
+        "daterange({start_date}, greatest({end_date}, {start_date}) + 1)"
+    ),
+}
+
+
+def schedule_models():
+    # In the order they have to be imported for the foreign keys
+    return [
+        Project,
+        Skill,
+        Resource,
+        Resource.skills.through,
+        Task,
+        Task.skills_required.through,
+        Assignments,
+    ]
+
+
+def table_columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def data_path(directory, table, format):
+    return os.path.join(directory, f"{table}.{format}")
+
+
+def export_table(model, stream, format="csv"):
+    qn = connection.ops.quote_name
+    query = "SELECT {} FROM {} ORDER BY {}".format(
+        ", ".join(qn(column) for column in table_columns(model)),
+        qn(model._meta.db_table),
+        qn(model._meta.pk.column),
+    )
+    if format == "csv":
+        copy = f"COPY ({query}) TO STDOUT WITH ({CSV_OPTIONS}, HEADER true)"
+    else:
+        copy = (
+            f"COPY (SELECT row_to_json(row) FROM ({query}) row) "
+            f"TO STDOUT WITH ({JSONL_OPTIONS})"
+        )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(copy, stream)
+        return cursor.rowcount
+
+
+def csv_record(values):
+    # Every value is quoted so only a null is written as the bare null marker
+    return (
+        ",".join(
+            CSV_NULL if value is None else '"{}"'.format(str(value).replace('"', '""'))
+            for value in values
+        )
+        + "\n"
+    )
+
+
+def csv_records(stream):
+    """
+    Yields the records of a csv file as they are written, for COPY to parse.
+    A record goes on over the next line while a quoted field is open.
+    """
+    record = []
+    quotes = 0
+    for line in stream:
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield "".join(record)
+            record = []
+            quotes = 0
+    if record:
+        yield "".join(record)
+
+
+def read_batches(stream, format, batch_size, skip=0):
+    """
+    Yields the header and the rows of the file batch_size rows at a time.
+    csv rows are whole records which COPY parses, not lists of values.
+
+    The first skip rows, already imported before, are read past.
+    """
+    if format == "csv":
+        rows = csv_records(stream)
+        header = next(rows, None)
+        if header is not None:
+            header = next(csv.reader([header]))
+    else:
+        rows = (line.rstrip("\n") for line in stream if line.strip())
+        header = None
+
+    batch = []
+    for position, row in enumerate(rows):
+        if position < skip:
+            continue
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield header, batch
+            batch = []
+    if batch:
+        yield header, batch
+
+
+def import_batch(model, header, rows, format="csv"):
+    """
+    Copies the rows into a staging table and upserts them from there by id.
+    csv rows are records as csv_record writes them.
+
+    Has to run in a transaction, the staging table is dropped on commit.
+    """
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    columns = table_columns(model)
+    if header is not None and not set(header) <= set(columns):
+        raise ValueError(
+            f"Unknown columns for {table}: {', '.join(set(header) - set(columns))}"
+        )
+
+    buffer = io.StringIO()
+    if format == "csv":
+        for row in rows:
+            buffer.write(row if row.endswith("\n") else f"{row}\n")
+        source = "import_staging"
+    else:
+        buffer.writelines(f"{row}\n" for row in rows)
+        source = f"import_staging, json_populate_record(NULL::{qn(table)}, line)"
+    buffer.seek(0)
+
+    selected = []
+    for column in columns:
+        expression = qn(column)
+        if (table, column) in DERIVED_COLUMNS:
+            derived = DERIVED_COLUMNS[(table, column)].format(
+                **{name: qn(name) for name in columns}
+            )
+            expression = f"COALESCE({expression}, {derived})"
+        selected.append(expression)
+    if model._meta.auto_created:
+        # Through rows only link existing objects, there is nothing to update
+        conflict = "ON CONFLICT DO NOTHING"
+    else:
+        conflict = "ON CONFLICT ({}) DO UPDATE SET {}".format(
+            qn(model._meta.pk.column),
+            ", ".join(
+                f"{qn(column)} = EXCLUDED.{qn(column)}"
+                for column in columns
+                if column != model._meta.pk.column
+            ),
+        )
+
+    with connection.cursor() as cursor:
+        # Left over when the batch runs in a savepoint of an outer transaction
+        cursor.execute("DROP TABLE IF EXISTS import_staging")
+        if format == "csv":
+            cursor.execute(
+                f"CREATE TEMP TABLE import_staging ON COMMIT DROP AS "
+                f"SELECT * FROM {qn(table)} WITH NO DATA"
+            )
+            cursor.copy_expert(
+                "COPY import_staging ({}) FROM STDIN WITH ({})".format(
+                    ", ".join(qn(column) for column in header), CSV_OPTIONS
+                ),
+                buffer,
+            )
+        else:
+            cursor.execute(
+                "CREATE TEMP TABLE import_staging (line json) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY import_staging FROM STDIN WITH ({JSONL_OPTIONS})", buffer
+            )
+        cursor.execute(
+            "INSERT INTO {} ({}) SELECT {} FROM {} {}".format(
+                qn(table),
+                ", ".join(qn(column) for column in columns),
+                ", ".join(selected),
+                source,
+                conflict,
+            )
+        )
+        return cursor.rowcount
+
+
+def reset_sequences(models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+class Checkpoint:
+    """
+    Rows imported so far per table, saved after every committed batch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tables = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.tables = json.load(f)
+
+    def done(self, table):
+        return self.tables.get(table, 0)
+
+    def advance(self, table, rows):
+        self.tables[table] = self.done(table) + rows
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(self.tables, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def clear(self):
+        self.tables = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def import_table(model, path, format, checkpoint, batch_size, report=None):
+    table = model._meta.db_table
+    imported = 0
+    with open(path, newline="") as stream:
+        for header, rows in read_batches(
+            stream, format, batch_size, skip=checkpoint.done(table)
+        ):
+            with transaction.atomic():
+                import_batch(model, header, rows, format)
+            checkpoint.advance(table, len(rows))
+            imported += len(rows)
+            if report is not None:
+                report(table, checkpoint.done(table))
+    reset_sequences([model])
+    # COPY sends no signals
+    invalidate_reference_data()
+    return imported
@@ -1,10 +1,16 @@
 import datetime
 
+from django.db import IntegrityError, transaction
 from django.db.models import Q
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
 
-from taskscheduler.helpers import can_assign_resource
-from taskscheduler.models import Assignments, Project, Resource, Skill, Task
+from taskscheduler.bulk import (BulkListSerializer, BulkModelSerializer,
+                                BulkPrimaryKeyRelatedField)
+from taskscheduler.helpers import can_assign_resource, is_assignment_overlap
+from taskscheduler.models import (Assignments, PlanJob, Project, Resource,
+                                  Skill, Task)
+from taskscheduler.reference_data import invalidate_reference_data
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -70,20 +76,34 @@ class ProjectSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class TaskSerializer(serializers.ModelSerializer):
-    project = serializers.PrimaryKeyRelatedField(queryset=Project.unfinished.all())
+class TaskSerializer(BulkModelSerializer):
+    project = BulkPrimaryKeyRelatedField(queryset=Project.unfinished.all())
 
     class Meta:
         model = Task
         exclude = ("is_deleted", "created_date", "completed_date")
-
-    def create(self, validated_data):
+        list_serializer_class = BulkListSerializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context.get("show_assignments"):
+            # Assignments are prefetched by the view
+            assignments = instance.assignments.all()
+            if assignments:
+                data["assignment"] = assignments[0].id
+                data["assigned_resource"] = assignments[0].resource_id
+        return data
+
+    def prepare_create(self, validated_data):
         validated_data["is_deleted"] = False
         validated_data["created_date"] = datetime.datetime.now()
         # Updating the completed date if it a completed task was created
         if validated_data["completed"]:
             validated_data["completed_date"] = datetime.datetime.now()
-        return super().create(validated_data)
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self.prepare_create(validated_data))
 
     def update(self, instance, validated_data):
         # Updating the completed date
@@ -94,6 +114,24 @@ class TaskSerializer(serializers.ModelSerializer):
                 assignment.save()
         return super().update(instance, validated_data)
 
+    def bulk_updated(self, instances, validated_data):
+        completed = [
+            instance.pk
+            for instance, attrs in zip(instances, validated_data)
+            if attrs.get("completed")
+        ]
+        if completed:
+            # The first assignment of each task, as update does one by one
+            first_assignments = (
+                Assignments.objects.filter(task_id__in=completed)
+                .order_by("task_id", "id")
+                .distinct("task_id")
+                .values("id")
+            )
+            Assignments.objects.filter(id__in=first_assignments).update(
+                status="COMPLETED"
+            )
+
     def validate_completed(self, value):
         instance = self.instance
         if instance and instance.completed and not value:
@@ -147,16 +185,40 @@ class TaskSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class ResourceSerializer(serializers.ModelSerializer):
+class ResourceSerializer(BulkModelSerializer):
     class Meta:
         model = Resource
         fields = "__all__"
-
-
-class SkillSerializer(serializers.ModelSerializer):
+        list_serializer_class = BulkListSerializer
+
+    def bulk_updated(self, instances, validated_data):
+        # bulk_update sends no post_save
+        invalidate_reference_data()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context.get("show_assignments"):
+            # Only the assigned ones are prefetched by the view
+            data["assignments"] = [
+                {
+                    "assignment": assignment.id,
+                    "task": assignment.task_id,
+                    "start_date": assignment.start_date,
+                    "end_date": assignment.end_date,
+                }
+                for assignment in instance.assignments.all()
+            ]
+        return data
+
+
+class SkillSerializer(BulkModelSerializer):
     class Meta:
         model = Skill
         fields = "__all__"
+        list_serializer_class = BulkListSerializer
+
+    def bulk_updated(self, instances, validated_data):
+        invalidate_reference_data()
 
 
 class PlanTaskSerializer(serializers.Serializer):
@@ -222,17 +284,16 @@ class AssignSerializer(serializers.Serializer):
             )
         if tasks is not None:
             for task_item in tasks:
-                task_id = task_item["task_id"]
-                start_date = task_item["start_date"]
-                end_date = task_item["end_date"]
-                task = Task.objects.get(id=task_id)
+                task = task_item["task_id"]
+                start_date = task_item.get("start_date")
+                end_date = task_item.get("end_date")
                 task_start = task.start_date
                 task_end = task.end_date
-                if start_date and task_start and start_date < task_start:
+                if start_date and task_start and start_date.date() < task_start:
                     raise serializers.ValidationError(
                         "Assignment must be within the task deadline"
                     )
-                if end_date and task_end and end_date > task_end:
+                if end_date and task_end and end_date.date() > task_end:
                     raise serializers.ValidationError(
                         "Assignment must be within the task deadline"
                     )
@@ -244,10 +305,67 @@ class AssignSerializer(serializers.Serializer):
         return attrs
 
 
+class PortfolioProjectSerializer(serializers.Serializer):
+    project_id = serializers.IntegerField()
+    priority = serializers.IntegerField(default=0)
+
+
+class PortfolioSerializer(serializers.Serializer):
+    projects = PortfolioProjectSerializer(many=True, allow_empty=False)
+    commit = serializers.BooleanField(default=False)
+
+    def validate_projects(self, value):
+        project_ids = [project["project_id"] for project in value]
+        if len(set(project_ids)) != len(project_ids):
+            raise serializers.ValidationError("A project can only be listed once.")
+        # Checking all the projects at once instead of a query per project
+        unfinished = set(
+            Project.unfinished.filter(id__in=project_ids).values_list("id", flat=True)
+        )
+        missing = [
+            project_id for project_id in project_ids if project_id not in unfinished
+        ]
+        if missing:
+            raise serializers.ValidationError(
+                f"Projects {missing} do not exist or are already completed."
+            )
+        return value
+
+
+class ReplanSerializer(serializers.Serializer):
+    task_id = serializers.PrimaryKeyRelatedField(
+        queryset=Task.objects.all(), allow_null=True, default=None
+    )
+    resource_id = serializers.PrimaryKeyRelatedField(
+        queryset=Resource.objects.all(), allow_null=True, default=None
+    )
+    since = serializers.DateField(allow_null=True, default=None)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        task_id = attrs.get("task_id")
+        resource_id = attrs.get("resource_id")
+        if task_id is None and resource_id is None:
+            raise serializers.ValidationError(
+                "Either 'task_id' or 'resource_id' must be provided."
+            )
+        if task_id is not None and resource_id is not None:
+            raise serializers.ValidationError(
+                "Only one of 'task_id' or 'resource_id' should be provided."
+            )
+        return attrs
+
+
+class AssignmentConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Resource is already assigned during this period."
+    default_code = "conflict"
+
+
 class AssignmentsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Assignments
-        fields = "__all__"
+        exclude = ("period",)
         read_only_fields = ("task",)
 
     def validate_status(self, value):
@@ -288,4 +406,17 @@ class AssignmentsSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     "Cannot update 'start_date' or 'end_date'. Resource cannot be re-assigned."
                 )
-        return super().update(instance, validated_data)
+        # A concurrent update can still take the period after the check
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as e:
+            if not is_assignment_overlap(e):
+                raise
+            raise AssignmentConflict()
+
+
+class PlanJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PlanJob
+        exclude = ("payload",)
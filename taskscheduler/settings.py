@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "taskscheduler",
 ]
@@ -49,6 +51,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "taskscheduler.middleware.RequestTimingMiddleware",
 ]
 
 ROOT_URLCONF = "taskscheduler.urls"
@@ -139,4 +142,91 @@ LOGGING = {
             "level": "INFO",
         },
     },
+    "loggers": {
+        "taskscheduler.requests": {
+            "handlers": ["file"],
+            "level": "INFO",
+        },
+        "taskscheduler.trace": {
+            "handlers": ["file"],
+            "level": "INFO",
+        },
+    },
 }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Holds the version of the skills and resources cached by every process,
+    # so it has to be shared by all of them, the table is created by the
+    # migrations
+    "reference_data": {
+        "BACKEND": os.environ.get(
+            "REFERENCE_DATA_CACHE_BACKEND",
+            "django.core.cache.backends.db.DatabaseCache",
+        ),
+        "LOCATION": os.environ.get(
+            "REFERENCE_DATA_CACHE_LOCATION", "reference_data_cache"
+        ),
+    },
+}
+
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "taskscheduler.pagination.IdCursorPagination",
+    "PAGE_SIZE": 100,
+}
+
+# Serve list and retrieve from values() rows instead of the serializers
+API_FAST_SERIALIZATION = bool(int(os.environ.get("API_FAST_SERIALIZATION", 0)))
+
+# Metrics
+
+# Addresses allowed to read /metrics besides staff users, comma separated
+METRICS_ALLOWED_IPS = os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+
+# Request timing
+
+# Send the timings back in a Server-Timing header as well as logging them
+REQUEST_TIMING_HEADER = True
+# Slowest statements logged for every request
+REQUEST_TIMING_SLOWEST_QUERIES = 3
+
+# Profiling of staff requests made with ?profile=1
+
+# Where the profiles are saved
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "taskscheduler-profiles")
+)
+# Profiles kept, the oldest ones are deleted
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 100))
+# Functions listed in the summary of a profile
+PROFILE_HOT_FUNCTIONS = 30
+# Slowest statements listed in the summary of a profile
+PROFILE_SLOWEST_QUERIES = 10
+
+# Planner
+
+# Worker processes used to plan independent groups of tasks in parallel
+PLANNER_WORKERS = int(os.environ.get("PLANNER_WORKERS", 1))
+# Smaller plans are not worth starting the worker processes for
+PLANNER_PARALLEL_MIN_TASKS = 1000
+# Share of the plan runs logging a decision trace of every task
+PLANNER_TRACE_SAMPLE_RATE = float(os.environ.get("PLANNER_TRACE_SAMPLE_RATE", 0))
+# Pruned resources listed in the trace of a task, the others are only counted
+PLANNER_TRACE_MAX_PRUNED = 20
+
+# Plan jobs
+
+# Seconds between the heartbeats of a running job, and without one after which
+# its worker is taken for dead and the job given to another worker
+PLAN_JOB_HEARTBEAT_INTERVAL = int(os.environ.get("PLAN_JOB_HEARTBEAT_INTERVAL", 30))
+PLAN_JOB_HEARTBEAT_TIMEOUT = int(os.environ.get("PLAN_JOB_HEARTBEAT_TIMEOUT", 120))
+
+# Reference data
+
+# Cache holding the version of the skills and resources cached in memory
+REFERENCE_DATA_CACHE = "reference_data"
+# Seconds a version lives, bounds how long a process with a local cache can
+# miss a change made by another one
+REFERENCE_DATA_TIMEOUT = int(os.environ.get("REFERENCE_DATA_TIMEOUT", 60))
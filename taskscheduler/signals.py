@@ -0,0 +1,78 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save)
+from django.dispatch import receiver
+
+from taskscheduler.models import Resource, Skill, Task
+from taskscheduler.reference_data import invalidate_reference_data
+from taskscheduler.skills import live_indexes
+
+
+@receiver(m2m_changed, sender=Resource.skills.through)
+def resource_skills_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    for index in list(live_indexes):
+        if action == "post_add":
+            if reverse:
+                for resource_id in pk_set:
+                    index.add_resource_skills(resource_id, [instance.pk])
+            else:
+                index.add_resource_skills(instance.pk, pk_set)
+        elif action == "post_remove":
+            if reverse:
+                for resource_id in pk_set:
+                    index.remove_resource_skills(resource_id, [instance.pk])
+            else:
+                index.remove_resource_skills(instance.pk, pk_set)
+        elif action == "post_clear":
+            if reverse:
+                index.clear_skill_resources(instance.pk)
+            else:
+                index.set_resource_skills(instance.pk, [])
+
+
+@receiver(m2m_changed, sender=Task.skills_required.through)
+def task_skills_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    for index in list(live_indexes):
+        if reverse:
+            # The tasks of a skill changed, their masks are rebuilt when needed
+            index.task_masks.clear()
+        else:
+            index.set_task_skills(
+                instance.pk, instance.skills_required.values_list("id", flat=True)
+            )
+
+
+@receiver(post_save, sender=Resource)
+def resource_saved(sender, instance, created, **kwargs):
+    if created:
+        for index in list(live_indexes):
+            index.add_resource(instance.pk)
+
+
+@receiver(post_delete, sender=Resource)
+def resource_deleted(sender, instance, **kwargs):
+    for index in list(live_indexes):
+        index.remove_resource(instance.pk)
+
+
+@receiver(post_delete, sender=Skill)
+def skill_deleted(sender, instance, **kwargs):
+    for index in list(live_indexes):
+        index.remove_skill(instance.pk)
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(m2m_changed, sender=Resource.skills.through)
+def reference_data_changed(sender, action="post_save", **kwargs):
+    if action.startswith("post_"):
+        invalidate_reference_data()
+
+
+@receiver(post_migrate)
+def database_reset(sender, **kwargs):
+    # Migrations and flush change the tables without sending any other signal
+    invalidate_reference_data()
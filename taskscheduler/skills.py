@@ -0,0 +1,143 @@
+import weakref
+
+# Every index alive in this process, kept up to date by taskscheduler.signals
+live_indexes = weakref.WeakSet()
+
+
+class SkillIndex:
+    """
+    Skills mapped to dense bit positions with a bitmask per resource and task.
+
+    Each skill also keeps the set of resources having it as a bitset over the
+    resource positions, so the resources having all the skills of a task are
+    found with one integer AND per required skill instead of a join per skill.
+    """
+
+    def __init__(self, resource_skills=()):
+        self.skill_bits = {}
+        self.skill_resources = []
+        self.resource_ids = []
+        self.resource_positions = {}
+        self.resource_masks = {}
+        self.task_masks = {}
+        self.all_resources = 0
+        for resource_id, skill_ids in resource_skills:
+            self.set_resource_skills(resource_id, skill_ids)
+        live_indexes.add(self)
+
+    def skill_bit(self, skill_id):
+        if skill_id not in self.skill_bits:
+            self.skill_bits[skill_id] = len(self.skill_bits)
+            self.skill_resources.append(0)
+        return self.skill_bits[skill_id]
+
+    def mask(self, skill_ids):
+        mask = 0
+        for skill_id in skill_ids:
+            mask |= 1 << self.skill_bit(skill_id)
+        return mask
+
+    def add_resource(self, resource_id):
+        if resource_id in self.resource_positions:
+            return
+        self.resource_masks[resource_id] = 0
+        if self.resource_ids and self.resource_ids[-1] > resource_id:
+            # Positions follow the resource ids so candidates come back in id order
+            self.resource_ids.append(resource_id)
+            self.reindex()
+        else:
+            self.resource_positions[resource_id] = len(self.resource_ids)
+            self.resource_ids.append(resource_id)
+            self.all_resources |= 1 << self.resource_positions[resource_id]
+
+    def remove_resource(self, resource_id):
+        if resource_id not in self.resource_positions:
+            return
+        self.resource_ids.remove(resource_id)
+        del self.resource_masks[resource_id]
+        self.reindex()
+
+    def reindex(self):
+        self.resource_ids.sort()
+        self.resource_positions = {
+            resource_id: position
+            for position, resource_id in enumerate(self.resource_ids)
+        }
+        self.all_resources = (1 << len(self.resource_ids)) - 1
+        self.skill_resources = [0] * len(self.skill_bits)
+        for resource_id, mask in self.resource_masks.items():
+            self._set_resource_bits(resource_id, mask, True)
+
+    def _set_resource_bits(self, resource_id, mask, value):
+        resource_bit = 1 << self.resource_positions[resource_id]
+        for skill_id, bit in self.skill_bits.items():
+            if mask >> bit & 1:
+                if value:
+                    self.skill_resources[bit] |= resource_bit
+                else:
+                    self.skill_resources[bit] &= ~resource_bit
+
+    def set_resource_skills(self, resource_id, skill_ids):
+        self.add_resource(resource_id)
+        self._set_resource_bits(resource_id, self.resource_masks[resource_id], False)
+        self.resource_masks[resource_id] = self.mask(skill_ids)
+        self._set_resource_bits(resource_id, self.resource_masks[resource_id], True)
+
+    def add_resource_skills(self, resource_id, skill_ids):
+        self.add_resource(resource_id)
+        mask = self.mask(skill_ids)
+        self.resource_masks[resource_id] |= mask
+        self._set_resource_bits(resource_id, mask, True)
+
+    def remove_resource_skills(self, resource_id, skill_ids):
+        if resource_id not in self.resource_positions:
+            return
+        mask = self.mask(skill_ids)
+        self.resource_masks[resource_id] &= ~mask
+        self._set_resource_bits(resource_id, mask, False)
+
+    def clear_skill_resources(self, skill_id):
+        if skill_id not in self.skill_bits:
+            return
+        bit = self.skill_bits[skill_id]
+        self.skill_resources[bit] = 0
+        for resource_id in self.resource_masks:
+            self.resource_masks[resource_id] &= ~(1 << bit)
+
+    def remove_skill(self, skill_id):
+        if skill_id not in self.skill_bits:
+            return
+        self.clear_skill_resources(skill_id)
+        bit = self.skill_bits[skill_id]
+        for task_id in self.task_masks:
+            self.task_masks[task_id] &= ~(1 << bit)
+
+    def task_mask(self, task):
+        if task.id not in self.task_masks:
+            self.task_masks[task.id] = self.mask(
+                skill.id for skill in task.skills_required.all()
+            )
+        return self.task_masks[task.id]
+
+    def set_task_skills(self, task_id, skill_ids):
+        if task_id in self.task_masks:
+            self.task_masks[task_id] = self.mask(skill_ids)
+
+    def has_skills(self, resource_id, mask):
+        return self.resource_masks.get(resource_id, 0) & mask == mask
+
+    def candidates(self, mask):
+        resources = self.all_resources
+        bit = 0
+        while mask and resources:
+            if mask & 1:
+                resources &= self.skill_resources[bit]
+            mask >>= 1
+            bit += 1
+
+        candidates = []
+        while resources:
+            lowest = resources & -resources
+            candidates.append(self.resource_ids[lowest.bit_length() - 1])
+            resources ^= lowest
+        return candidates
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+import freezegun
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from taskscheduler.benchmarks import compare
+from taskscheduler.models import Task
+
+
+@freezegun.freeze_time("2023-07-17")
+class BenchmarkTestCase(TestCase):
+    def test_benchmark_and_compare(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark_scheduler",
+                "--scales",
+                "10",
+                "--sample",
+                "3",
+                "--output",
+                output,
+                stdout=StringIO(),
+            )
+            with open(output) as f:
+                results = json.load(f)
+            self.assertEqual(
+                set(results["results"]["10"]),
+                {"find_earliest_assignment", "can_assign_resource", "plan", "assign"},
+            )
+            self.assertFalse(Task.objects.exists())
+
+            # A baseline doing half the queries makes every case a regression
+            for metrics in results["results"]["10"].values():
+                metrics["queries"] //= 2
+            with open(output, "w") as f:
+                json.dump(results, f)
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark_scheduler",
+                    "--scales",
+                    "10",
+                    "--sample",
+                    "3",
+                    "--compare",
+                    output,
+                    stdout=StringIO(),
+                )
+
+    def test_compare_ignores_small_time_differences(self):
+        metrics = {
+            "wall_time": 0.001,
+            "queries": 5,
+            "sql_time": 0.001,
+            "peak_memory": 100,
+        }
+        baseline = {"results": {"10": {"plan": metrics}}}
+        current = {"results": {"10": {"plan": dict(metrics, wall_time=0.002)}}}
+        self.assertEqual(compare(baseline, current), [])
+        current["results"]["10"]["plan"]["peak_memory"] = 200
+        self.assertEqual(len(compare(baseline, current)), 1)
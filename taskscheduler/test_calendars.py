@@ -0,0 +1,87 @@
+import random
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase
+
+from taskscheduler.calendars import ResourceCalendar
+
+
+class ResourceCalendarTestCase(SimpleTestCase):
+    def setUp(self):
+        self.calendar = ResourceCalendar(
+            [
+                (date(2023, 7, 20), date(2023, 7, 22), 1),
+                (date(2023, 7, 21), date(2023, 7, 25), 2),
+                (date(2023, 8, 1), date(2023, 8, 3), 3),
+            ]
+        )
+
+    def test_find_gap_before_first_assignment(self):
+        self.assertEqual(
+            self.calendar.find_gap(date(2023, 7, 18), 1), date(2023, 7, 18)
+        )
+
+    def test_find_gap_skips_short_gaps(self):
+        self.assertEqual(
+            self.calendar.find_gap(date(2023, 7, 18), 3), date(2023, 7, 26)
+        )
+        self.assertEqual(self.calendar.find_gap(date(2023, 7, 18), 7), date(2023, 8, 4))
+
+    def test_overlaps(self):
+        self.assertTrue(self.calendar.overlaps(date(2023, 7, 25), date(2023, 7, 26)))
+        self.assertFalse(self.calendar.overlaps(date(2023, 7, 26), date(2023, 7, 31)))
+        self.assertTrue(self.calendar.overlaps(date(2023, 7, 21), date(2023, 7, 21)))
+
+    def test_overlaps_excluding_an_assignment(self):
+        self.assertFalse(
+            self.calendar.overlaps(date(2023, 8, 1), date(2023, 8, 2), exclude=3)
+        )
+        self.assertTrue(
+            self.calendar.overlaps(date(2023, 7, 20), date(2023, 7, 20), exclude=2)
+        )
+
+    def test_remove(self):
+        self.calendar.remove(2)
+        self.assertEqual(
+            self.calendar.find_gap(date(2023, 7, 18), 3), date(2023, 7, 23)
+        )
+        self.assertEqual(len(self.calendar), 2)
+
+    def test_matches_a_linear_walk(self):
+        def walk(intervals, start_date, days):
+            prev_end_date = start_date - timedelta(days=1)
+            for interval_start_date, interval_end_date in sorted(intervals):
+                if interval_end_date <= prev_end_date:
+                    continue
+                if interval_start_date > prev_end_date + timedelta(days=days):
+                    break
+                prev_end_date = interval_end_date
+            return prev_end_date + timedelta(days=1)
+
+        rnd = random.Random(0)
+        calendar = ResourceCalendar()
+        intervals = {}
+        for key in range(400):
+            if intervals and rnd.random() < 0.3:
+                removed = rnd.choice(list(intervals))
+                calendar.remove(removed)
+                del intervals[removed]
+            else:
+                start_date = date(2023, 7, 1) + timedelta(days=rnd.randint(0, 200))
+                end_date = start_date + timedelta(days=rnd.randint(0, 6))
+                calendar.add(start_date, end_date, key)
+                intervals[key] = (start_date, end_date)
+            start_date = date(2023, 7, 1) + timedelta(days=rnd.randint(0, 210))
+            days = rnd.randint(0, 8)
+            self.assertEqual(
+                calendar.find_gap(start_date, days),
+                walk(intervals.values(), start_date, days),
+            )
+            end_date = start_date + timedelta(days=days)
+            self.assertEqual(
+                calendar.overlaps(start_date, end_date),
+                any(
+                    interval_start_date <= end_date and interval_end_date >= start_date
+                    for interval_start_date, interval_end_date in intervals.values()
+                ),
+            )
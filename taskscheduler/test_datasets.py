@@ -0,0 +1,78 @@
+from datetime import date
+from io import StringIO
+
+import freezegun
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from taskscheduler.models import Assignments, Project, Resource, Skill, Task
+
+
+@freezegun.freeze_time("2023-07-17")
+class GenerateDatasetTestCase(APITestCase):
+    def generate(self, seed):
+        call_command(
+            "generate_dataset",
+            "--projects",
+            "3",
+            "--tasks-per-project",
+            "40",
+            "--resources",
+            "8",
+            "--skills",
+            "5",
+            "--seed",
+            str(seed),
+            "--batch-size",
+            "25",
+            stdout=StringIO(),
+        )
+
+    def snapshot(self):
+        return (
+            list(
+                Task.objects.order_by("id").values_list(
+                    "name", "estimation", "start_date", "end_date"
+                )
+            ),
+            list(
+                Task.skills_required.through.objects.order_by("id").values_list(
+                    "skill__name"
+                )
+            ),
+            list(
+                Assignments.objects.order_by("id").values_list(
+                    "start_date", "end_date", "task__name", "resource__name"
+                )
+            ),
+        )
+
+    def clear(self):
+        for model in (Assignments, Task, Resource, Skill, Project):
+            model._base_manager.all().delete()
+
+    def test_same_seed_same_dataset(self):
+        self.generate(seed=1)
+        self.assertEqual(Task.objects.count(), 120)
+        self.assertEqual(Project.objects.count(), 3)
+        expected = self.snapshot()
+        self.clear()
+        self.generate(seed=1)
+        self.assertEqual(self.snapshot(), expected)
+        self.clear()
+        self.generate(seed=2)
+        self.assertNotEqual(self.snapshot(), expected)
+
+    def test_generated_tasks_can_be_planned(self):
+        self.generate(seed=1)
+        self.assertEqual(Resource.objects.first().availability_start_date, date.today())
+        project = Project.objects.order_by("id").first()
+        response = self.client.post(
+            reverse("plan-create"), {"project_id": project.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.json()),
+            Task.unassigned_objects.filter(project=project).count(),
+        )
@@ -0,0 +1,29 @@
+import freezegun
+from django.test import TestCase
+
+from taskscheduler.differential import (differential, parallel_planner_engine,
+                                        planner_engine)
+from taskscheduler.models import Task
+
+
+def ignores_start_date(project_id):
+    Task.objects.filter(project=project_id).update(start_date=None)
+    return planner_engine(project_id)
+
+
+@freezegun.freeze_time("2023-07-17")
+class DifferentialTestCase(TestCase):
+    def test_planner_matches_reference(self):
+        mismatch = differential(planner_engine, runs=60)
+        self.assertIsNone(mismatch, mismatch)
+
+    def test_parallel_planner_matches_reference(self):
+        mismatch = differential(parallel_planner_engine, runs=30)
+        self.assertIsNone(mismatch, mismatch)
+
+    def test_mismatch_is_shrunk(self):
+        mismatch = differential(ignores_start_date, runs=100)
+        self.assertIsNotNone(mismatch)
+        self.assertEqual(len(mismatch.scenario.tasks), 1)
+        self.assertIsNotNone(mismatch.scenario.tasks[0][1])
+        self.assertLessEqual(len(mismatch.scenario.resources), 1)
@@ -0,0 +1,116 @@
+from datetime import date
+
+import freezegun
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+
+from taskscheduler.models import Project, Resource, Skill, Task
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@freezegun.freeze_time("2023-07-17")
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        skill = Skill.objects.create(name="backend")
+        other = Skill.objects.create(name="design")
+        resource = Resource.objects.create(
+            name="Resource", availability_start_date=date.today()
+        )
+        resource.skills.set([skill])
+        self.project = Project.objects.create(
+            name="Project", is_deleted=False, completed=False
+        )
+        for skills in ([skill], [skill], [other]):
+            task = Task.objects.create(
+                project=self.project,
+                name="Task",
+                estimation=2,
+                is_deleted=False,
+                completed=False,
+            )
+            task.skills_required.set(skills)
+
+    def test_planner_metrics(self):
+        self.assert_planner_metrics()
+
+    @override_settings(PLANNER_WORKERS=2, PLANNER_PARALLEL_MIN_TASKS=0)
+    def test_planner_metrics_in_parallel(self):
+        # The workers' metrics are added up in the parent
+        self.assert_planner_metrics()
+
+    def assert_planner_metrics(self):
+        planned = sample("taskscheduler_tasks_planned_total")
+        failed = sample("taskscheduler_tasks_failed_total")
+        calls = sample("taskscheduler_find_earliest_assignment_seconds_count")
+        candidates = sample("taskscheduler_candidate_resources_sum")
+        requests = sample(
+            "taskscheduler_request_duration_seconds_count",
+            method="POST",
+            route="plan-create",
+        )
+
+        response = self.client.post(
+            reverse("plan-create"), {"project_id": self.project.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        # The design task nobody can take stops the plan after the two others
+        self.assertEqual(sample("taskscheduler_tasks_planned_total") - planned, 2)
+        self.assertEqual(sample("taskscheduler_tasks_failed_total") - failed, 1)
+        self.assertEqual(
+            sample("taskscheduler_find_earliest_assignment_seconds_count") - calls, 3
+        )
+        self.assertEqual(
+            sample("taskscheduler_candidate_resources_sum") - candidates, 2
+        )
+        self.assertEqual(
+            sample(
+                "taskscheduler_request_duration_seconds_count",
+                method="POST",
+                route="plan-create",
+            )
+            - requests,
+            1,
+        )
+
+    def test_metrics_endpoint(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode()
+        for name in (
+            "taskscheduler_request_duration_seconds",
+            "taskscheduler_tasks_planned_total",
+            "taskscheduler_find_earliest_assignment_seconds",
+            "taskscheduler_assignments_rejected_total",
+            "taskscheduler_request_queries",
+        ):
+            self.assertIn(f"# TYPE {name.removesuffix('_total')}", content)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.1"])
+    def test_metrics_endpoint_is_restricted(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 200)
+        self.client.force_login(
+            User.objects.create_user("staff", password="staff", is_staff=True)
+        )
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_request_queries(self):
+        labels = {"method": "GET", "route": "project-list"}
+        requests = sample("taskscheduler_request_queries_count", **labels)
+        queries = sample("taskscheduler_request_queries_sum", **labels)
+        self.client.get(reverse("project-list"))
+        self.assertEqual(
+            sample("taskscheduler_request_queries_count", **labels) - requests, 1
+        )
+        self.assertGreater(
+            sample("taskscheduler_request_queries_sum", **labels) - queries, 0
+        )
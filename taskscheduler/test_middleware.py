@@ -0,0 +1,47 @@
+import json
+from unittest import mock
+
+import freezegun
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from taskscheduler.models import Skill
+
+
+@freezegun.freeze_time("2023-07-17")
+class RequestTimingTestCase(APITestCase):
+    def setUp(self):
+        Skill.objects.bulk_create(Skill(name=f"Skill {i}") for i in range(5))
+
+    def test_server_timing_and_log(self):
+        with self.assertLogs("taskscheduler.requests", "INFO") as logs:
+            response = self.client.get("/api/skill/")
+        self.assertEqual(response.status_code, 200)
+
+        metrics = [
+            metric.split(";")[0] for metric in response["Server-Timing"].split(", ")
+        ]
+        self.assertEqual(metrics, ["sql", "view", "serialize", "render", "total"])
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["method"], "GET")
+        self.assertEqual(line["path"], "/api/skill/")
+        self.assertEqual(line["status"], 200)
+        self.assertGreaterEqual(line["queries"], 1)
+        self.assertIn(f'desc="{line["queries"]} queries"', response["Server-Timing"])
+        self.assertLessEqual(len(line["slowest"]), 3)
+        self.assertIn("skill", line["slowest"][0]["sql"])
+        self.assertGreaterEqual(line["total_ms"], line["view_ms"])
+        self.assertGreaterEqual(line["view_ms"], line["serialize_ms"])
+
+    def test_serialize_timed_once_per_request(self):
+        with mock.patch("taskscheduler.middleware.record_serialize") as record:
+            self.client.get("/api/skill/")
+            self.client.get(f"/api/skill/{Skill.objects.first().id}/")
+        self.assertEqual(record.call_count, 2)
+
+    @override_settings(REQUEST_TIMING_HEADER=False)
+    def test_header_disabled(self):
+        with self.assertLogs("taskscheduler.requests", "INFO"):
+            response = self.client.get("/api/skill/")
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,537 @@
+import json
+from datetime import date, datetime, timezone
+from io import StringIO
+from unittest import mock
+
+import freezegun
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+
+from taskscheduler.helpers import find_earliest_assignment
+from taskscheduler.jobs import beat
+from taskscheduler.models import (Assignments, PlanJob, Project, Resource,
+                                  Skill, Task)
+from taskscheduler.planner import Planner
+from taskscheduler.reference_data import reference_data
+
+
+@freezegun.freeze_time("2023-07-17")
+class PlannerTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.backend = Skill.objects.create(name="backend")
+        self.frontend = Skill.objects.create(name="frontend")
+        self.deployment = Skill.objects.create(name="deployment")
+        self.design = Skill.objects.create(name="design")
+        self.project = Project.objects.create(
+            name="Your Project",
+            created_date=date.today(),
+            is_deleted=False,
+            completed=False,
+        )
+
+        self.tasks = [
+            self.create_task(3, [self.backend]),
+            self.create_task(3, [self.frontend]),
+            self.create_task(3, [self.backend, self.deployment]),
+            self.create_task(2, [self.deployment]),
+            self.create_task(1, [self.design]),
+            self.create_task(5, [self.backend], date(2023, 8, 7), date(2023, 8, 14)),
+            self.create_task(2, [self.backend], date(2023, 7, 26), date(2023, 8, 3)),
+        ]
+        self.resources = [
+            self.create_resource([self.backend, self.deployment]),
+            self.create_resource([self.frontend]),
+            self.create_resource([self.design]),
+            self.create_resource([self.deployment]),
+        ]
+
+    def create_task(self, estimation, skills, start_date=None, end_date=None, **kwargs):
+        task = Task.objects.create(
+            project=kwargs.get("project", self.project),
+            name="Task",
+            estimation=estimation,
+            start_date=start_date,
+            end_date=end_date,
+            created_date=date.today(),
+            is_deleted=False,
+            completed=False,
+        )
+        task.skills_required.set(skills)
+        return task
+
+    def create_resource(self, skills):
+        resource = Resource.objects.create(
+            name="Resource", availability_start_date=date.today()
+        )
+        resource.skills.set(skills)
+        return resource
+
+    def expected_plan(self):
+        task1, task2, task3, task4, task5, task6, task7 = self.tasks
+        resource1, resource2, resource3, resource4 = self.resources
+        return [
+            (task7.id, resource1.id, "2023-07-26", "2023-07-28"),
+            (task6.id, resource1.id, "2023-08-07", "2023-08-12"),
+            (task1.id, resource1.id, "2023-07-18", "2023-07-21"),
+            (task2.id, resource2.id, "2023-07-18", "2023-07-21"),
+            (task3.id, resource1.id, "2023-07-22", "2023-07-25"),
+            (task4.id, resource4.id, "2023-07-18", "2023-07-20"),
+            (task5.id, resource3.id, "2023-07-18", "2023-07-19"),
+        ]
+
+    def as_tuples(self, response):
+        return self.items_as_tuples(response.json())
+
+    def items_as_tuples(self, items):
+        return [
+            (item["task_id"], item["resource_id"], item["start_date"], item["end_date"])
+            for item in items
+        ]
+
+    def test_plan_project(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("plan-create"), {"project_id": self.project.id}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.as_tuples(response), self.expected_plan())
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("INSERT")]
+        )
+
+    def test_plan_project_ndjson(self):
+        response = self.client.post(
+            reverse("plan-create") + "?format=ndjson",
+            {"project_id": self.project.id},
+            format="json",
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(
+            self.items_as_tuples(json.loads(line) for line in lines),
+            self.expected_plan(),
+        )
+
+    def test_plan_ndjson_error_ends_stream(self):
+        self.create_task(1, [self.frontend, self.design])
+        response = self.client.post(
+            reverse("plan-create") + "?format=ndjson",
+            {"project_id": self.project.id},
+            format="json",
+        )
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 8)
+        self.assertIn("could not be scheduled", json.loads(lines[-1])["message"])
+
+    def test_list_assignments_ndjson(self):
+        self.client.post(reverse("assign"), {"project_id": self.project.id})
+        response = self.client.get(reverse("assignments-list"), {"format": "ndjson"})
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            self.client.get(reverse("assignments-list")).json()["results"],
+        )
+
+    def test_assign_project(self):
+        response = self.client.post(
+            reverse("assign"), {"project_id": self.project.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.as_tuples(response), self.expected_plan())
+        self.assertEqual(Assignments.objects.filter(status="ASSIGNED").count(), 7)
+
+    def test_assign_task_with_dates(self):
+        task1 = self.tasks[0]
+        resource1 = self.resources[0]
+        data = {
+            "tasks": [
+                {
+                    "task_id": task1.id,
+                    "resource_id": resource1.id,
+                    "start_date": "2023-07-20",
+                    "end_date": "2023-07-22",
+                }
+            ]
+        }
+        response = self.client.post(reverse("assign"), data, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        # The same slot is now taken for another backend task
+        data["tasks"][0]["task_id"] = self.tasks[2].id
+        response = self.client.post(reverse("assign"), data, format="json")
+        self.assertEqual(response.status_code, 409)
+
+    def test_single_day_assignment_is_rejected_inside_another(self):
+        data = {
+            "tasks": [
+                {
+                    "task_id": self.tasks[0].id,
+                    "resource_id": self.resources[0].id,
+                    "start_date": "2023-07-20",
+                    "end_date": "2023-07-25",
+                }
+            ]
+        }
+        response = self.client.post(reverse("assign"), data, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        data["tasks"][0].update(
+            task_id=self.tasks[2].id, start_date="2023-07-22", end_date="2023-07-22"
+        )
+        response = self.client.post(reverse("assign"), data, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Assignments.objects.filter(task=self.tasks[2]).exists())
+
+    def test_assignment_touching_the_end_day_is_rejected(self):
+        resource1 = self.resources[0]
+        Assignments.objects.create(
+            task=self.tasks[0],
+            resource=resource1,
+            start_date=date(2023, 7, 20),
+            end_date=date(2023, 7, 25),
+            status="ASSIGNED",
+        )
+        data = {
+            "tasks": [
+                {
+                    "task_id": self.tasks[2].id,
+                    "resource_id": resource1.id,
+                    "start_date": "2023-07-25",
+                    "end_date": "2023-07-28",
+                }
+            ]
+        }
+        response = self.client.post(reverse("assign"), data, format="json")
+        self.assertEqual(response.status_code, 409)
+
+        assignment = Assignments.objects.create(
+            task=self.tasks[2],
+            resource=resource1,
+            start_date=date(2023, 7, 26),
+            end_date=date(2023, 7, 28),
+            status="ASSIGNED",
+        )
+        data = {
+            "resource": resource1.id,
+            "start_date": "2023-07-25",
+            "end_date": "2023-07-28",
+            "status": "ASSIGNED",
+        }
+        url = reverse("assignments-detail", args=[assignment.id])
+        response = self.client.put(url, data, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        # Another request taking the day after the check is a conflict too
+        with mock.patch(
+            "taskscheduler.serializers.can_assign_resource", return_value=True
+        ):
+            response = self.client.put(url, data, format="json")
+        self.assertEqual(response.status_code, 409)
+        assignment.refresh_from_db()
+        self.assertEqual(assignment.start_date, date(2023, 7, 26))
+
+    def test_overlapping_assignments_are_rejected(self):
+        task1, task2 = self.tasks[:2]
+        resource1 = self.resources[0]
+        Assignments.objects.create(
+            task=task1,
+            resource=resource1,
+            start_date=date(2023, 7, 18),
+            end_date=date(2023, 7, 21),
+            status="ASSIGNED",
+        )
+        Assignments.objects.create(
+            task=task2,
+            resource=resource1,
+            start_date=date(2023, 7, 22),
+            end_date=date(2023, 7, 23),
+            status="ASSIGNED",
+        )
+        Assignments.objects.create(
+            task=task2,
+            resource=resource1,
+            start_date=date(2023, 7, 19),
+            end_date=date(2023, 7, 20),
+            status="COMPLETED",
+        )
+        with self.assertRaises(IntegrityError):
+            Assignments.objects.create(
+                task=task2,
+                resource=resource1,
+                start_date=date(2023, 7, 19),
+                end_date=date(2023, 7, 20),
+                status="ASSIGNED",
+            )
+
+    def test_replan_after_deleted_assignment(self):
+        self.client.post(reverse("assign"), {"project_id": self.project.id})
+        task1, task2, task3 = self.tasks[:3]
+        resource1 = self.resources[0]
+        Assignments.objects.filter(task=task1).delete()
+
+        response = self.client.post(
+            reverse("replan"),
+            {"resource_id": resource1.id, "since": "2023-07-18"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        assignment = Assignments.objects.get(task=task3)
+        self.assertEqual(assignment.start_date, date(2023, 7, 18))
+        self.assertEqual(assignment.end_date, date(2023, 7, 21))
+        # Other resources are left alone
+        self.assertEqual(
+            Assignments.objects.get(task=task2).start_date, date(2023, 7, 18)
+        )
+        self.assertEqual(Assignments.objects.count(), 6)
+
+    def test_replan_keeps_assignments_of_completed_tasks(self):
+        self.client.post(reverse("assign"), {"project_id": self.project.id})
+        task3 = self.tasks[2]
+        Task.objects.filter(id=task3.id).update(completed=True)
+
+        response = self.client.post(
+            reverse("replan"),
+            {"resource_id": self.resources[0].id, "since": "2023-07-18"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            Assignments.objects.get(task=task3).start_date, date(2023, 7, 22)
+        )
+        self.assertEqual(Assignments.objects.count(), 7)
+
+    def test_replan_changed_task(self):
+        self.client.post(reverse("assign"), {"project_id": self.project.id})
+        task1, task3 = self.tasks[0], self.tasks[2]
+        Task.objects.filter(id=task1.id).update(estimation=1)
+
+        response = self.client.post(
+            reverse("replan"), {"task_id": task1.id, "dry_run": True}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        planned = {item["task_id"]: item for item in response.json()}
+        self.assertEqual(planned[task1.id]["end_date"], "2023-07-19")
+        self.assertEqual(planned[task3.id]["start_date"], "2023-07-20")
+        # A dry run leaves the stored assignments untouched
+        self.assertEqual(
+            Assignments.objects.get(task=task3).start_date, date(2023, 7, 22)
+        )
+
+    def test_portfolio_priority(self):
+        other = Project.objects.create(name="Other", is_deleted=False, completed=False)
+        urgent = self.create_task(3, [self.design], project=other)
+        data = {
+            "projects": [
+                {"project_id": self.project.id},
+                {"project_id": other.id, "priority": 1},
+            ],
+            "commit": True,
+        }
+        response = self.client.post(reverse("portfolio"), data, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["task_id"], urgent.id)
+        self.assertEqual(response.json()[0]["project_id"], other.id)
+        self.assertEqual(
+            Assignments.objects.get(task=urgent).start_date, date(2023, 7, 18)
+        )
+        # The design task of the first project waits for the urgent one
+        self.assertEqual(
+            Assignments.objects.get(task=self.tasks[4]).start_date, date(2023, 7, 22)
+        )
+        self.assertEqual(Assignments.objects.count(), 8)
+
+    @override_settings(PLANNER_WORKERS=2, PLANNER_PARALLEL_MIN_TASKS=0)
+    def test_assign_project_in_parallel(self):
+        response = self.client.post(
+            reverse("assign"), {"project_id": self.project.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.as_tuples(response), self.expected_plan())
+        self.assertEqual(Assignments.objects.filter(status="ASSIGNED").count(), 7)
+
+    @override_settings(PLANNER_WORKERS=2, PLANNER_PARALLEL_MIN_TASKS=0)
+    def test_unschedulable_task_in_parallel(self):
+        self.create_task(1, [self.frontend, self.design])
+        response = self.client.post(
+            reverse("assign"), {"project_id": self.project.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Assignments.objects.exists())
+
+    def test_unschedulable_task(self):
+        self.create_task(1, [self.frontend, self.design])
+        response = self.client.post(
+            reverse("plan-create"), {"project_id": self.project.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_assign_project_async(self):
+        response = self.client.post(
+            reverse("assign") + "?async=1",
+            {"project_id": self.project.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertFalse(Assignments.objects.exists())
+
+        call_command("run_plan_worker", "--once", stdout=StringIO())
+        response = self.client.get(reverse("planjob-detail", args=[job_id]))
+        self.assertEqual(response.json()["status"], "DONE")
+        self.assertEqual(response.json()["status_code"], 200)
+        self.assertEqual(
+            self.items_as_tuples(response.json()["result"]), self.expected_plan()
+        )
+        self.assertEqual(Assignments.objects.filter(status="ASSIGNED").count(), 7)
+
+    def test_failed_plan_job(self):
+        self.create_task(1, [self.frontend, self.design])
+        response = self.client.post(
+            reverse("plan-create") + "?async=1",
+            {"project_id": self.project.id},
+            format="json",
+        )
+        call_command("run_plan_worker", "--once", stdout=StringIO())
+        job = PlanJob.objects.get(id=response.json()["job_id"])
+        self.assertEqual(job.status, "FAILED")
+        self.assertEqual(job.status_code, 400)
+
+    @override_settings(PLAN_JOB_HEARTBEAT_TIMEOUT=600)
+    def test_stale_plan_job_is_claimed_again(self):
+        payload = {"project_id": self.project.id}
+        started_date = datetime(2023, 7, 16, 22, 0, tzinfo=timezone.utc)
+        stale = PlanJob.objects.create(
+            kind="ASSIGN",
+            payload=payload,
+            status="RUNNING",
+            started_date=started_date,
+            heartbeat_date=datetime(2023, 7, 16, 23, 0, tzinfo=timezone.utc),
+        )
+        # Running for two hours but its worker is still alive
+        running = PlanJob.objects.create(
+            kind="ASSIGN",
+            payload=payload,
+            status="RUNNING",
+            started_date=started_date,
+            heartbeat_date=datetime(2023, 7, 16, 23, 55, tzinfo=timezone.utc),
+        )
+        call_command("run_plan_worker", "--once", stdout=StringIO())
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stale.status, "DONE")
+        self.assertEqual(running.status, "RUNNING")
+
+    def test_heartbeat(self):
+        job = PlanJob.objects.create(
+            kind="ASSIGN", payload={"project_id": self.project.id}, status="RUNNING"
+        )
+        beat(job)
+        job.refresh_from_db()
+        self.assertEqual(job.heartbeat_date, datetime(2023, 7, 17, tzinfo=timezone.utc))
+
+    def test_assign_project_not_async(self):
+        response = self.client.post(
+            reverse("assign") + "?async=0",
+            {"project_id": self.project.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PlanJob.objects.exists())
+        self.assertEqual(Assignments.objects.filter(status="ASSIGNED").count(), 7)
+
+    def test_named_resource_reads_only_its_calendar(self):
+        task, other = Planner.load_tasks([self.tasks[0].id, self.tasks[3].id])
+        resource = self.resources[0]
+        planner = Planner()
+        with CaptureQueriesContext(connection) as queries:
+            planner.assign_task(task, resource.id, date(2023, 7, 18), date(2023, 7, 20))
+            planner.plan_task(other, resource.id)
+        self.assertEqual(len(queries), 1)
+        self.assertIn(f"IN ({resource.id})", queries[0]["sql"])
+
+    def test_planned_task_ends_before_the_next_assignment(self):
+        design_task = self.tasks[4]
+        resource3 = self.resources[2]
+        Assignments.objects.create(
+            task=self.create_task(3, [self.design]),
+            resource=resource3,
+            start_date=date(2023, 7, 19),
+            end_date=date(2023, 7, 25),
+            status="ASSIGNED",
+        )
+        # 07-18 to 07-19 would take the first day of the existing assignment
+        expected = (date(2023, 7, 26), date(2023, 7, 27), resource3.id)
+        self.assertEqual(find_earliest_assignment(design_task.id), expected)
+        (task,) = Planner.load_tasks([design_task.id])
+        self.assertEqual(Planner().find_earliest_assignment(task), expected)
+
+    def test_memoized_assignments(self):
+        design_task = self.create_task(1, [self.design])
+        frontend_task = self.create_task(3, [self.frontend])
+        design, frontend = Planner.load_tasks([design_task.id, frontend_task.id])
+        planner = Planner()
+        first = planner.find_earliest_assignment(design)
+        self.assertEqual(len(planner.assignment_memo), 1)
+
+        # Placing on a resource the shape does not use keeps the memo
+        planner.plan_task(frontend)
+        self.assertEqual(len(planner.assignment_memo), 1)
+        self.assertEqual(planner.find_earliest_assignment(self.tasks[4]), first)
+
+        # Placing on one of its resources drops it
+        planner.plan_task(self.tasks[4])
+        self.assertEqual(planner.assignment_memo, {})
+        start_date, _, resource_id = planner.find_earliest_assignment(design)
+        self.assertEqual(resource_id, first[2])
+        self.assertGreater(start_date, first[0])
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        def count_queries(project):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse("assign"), {"project_id": project.id}, format="json"
+                )
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        small = Project.objects.create(name="Small", is_deleted=False, completed=False)
+        large = Project.objects.create(name="Large", is_deleted=False, completed=False)
+        for _ in range(2):
+            self.create_task(1, [self.backend], project=small)
+        for _ in range(20):
+            self.create_task(1, [self.backend], project=large)
+        # Read once in the test transaction, not by the first request only
+        reference_data()
+
+        self.assertEqual(count_queries(small), count_queries(large))
+
+
+@freezegun.freeze_time("2023-07-17")
+class PlanSnapshotTestCase(APITransactionTestCase):
+    def test_plan_outside_transaction(self):
+        project = Project.objects.create(
+            name="Project", is_deleted=False, completed=False
+        )
+        resource = Resource.objects.create(
+            name="Resource", availability_start_date=date.today()
+        )
+        task = Task.objects.create(
+            project=project,
+            name="Task",
+            estimation=2,
+            is_deleted=False,
+            completed=False,
+        )
+
+        response = self.client.post(
+            reverse("plan-create"), {"project_id": project.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["task_id"], task.id)
+        self.assertEqual(response.json()[0]["resource_id"], resource.id)
+        self.assertFalse(Assignments.objects.exists())
@@ -0,0 +1,115 @@
+import pstats
+import tempfile
+from datetime import date
+
+import freezegun
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from taskscheduler.models import Project, Resource, Skill, Task
+
+
+@freezegun.freeze_time("2023-07-17")
+class ProfilingTestCase(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        skill = Skill.objects.create(name="backend")
+        resource = Resource.objects.create(
+            name="Resource", availability_start_date=date.today()
+        )
+        resource.skills.set([skill])
+        self.project = Project.objects.create(
+            name="Project", is_deleted=False, completed=False
+        )
+        task = Task.objects.create(
+            project=self.project,
+            name="Task",
+            estimation=2,
+            is_deleted=False,
+            completed=False,
+        )
+        task.skills_required.set([skill])
+        self.staff = User.objects.create(username="staff", is_staff=True)
+
+    def test_profile_assign(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(
+            f"{reverse('assign')}?profile=1",
+            {"project_id": self.project.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+        summary = self.client.get(response["X-Profile"]).json()
+        self.assertEqual(summary["path"], reverse("assign"))
+        self.assertEqual(summary["user"], "staff")
+        self.assertGreater(summary["queries"], 0)
+        self.assertTrue(summary["slowest_queries"])
+        (plan,) = [
+            row
+            for row in summary["hot_functions"]
+            if row["location"].endswith("(plan)")
+        ]
+        self.assertTrue(
+            any(caller["location"].endswith("(run)") for caller in plan["callers"])
+        )
+
+        download = self.client.get(response["X-Profile"], {"download": "1"})
+        self.assertEqual(download.status_code, 200)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"".join(download.streaming_content))
+            f.flush()
+            self.assertTrue(pstats.Stats(f.name).stats)
+
+    def test_profile_header(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(
+            reverse("plan-create"),
+            {"project_id": self.project.id},
+            format="json",
+            HTTP_X_PROFILE="1",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("X-Profile"))
+
+    @override_settings(PROFILE_KEEP=1)
+    def test_oldest_profiles_deleted(self):
+        self.client.force_authenticate(self.staff)
+        profiles = [
+            self.client.post(
+                f"{reverse('plan-create')}?profile=1",
+                {"project_id": self.project.id},
+                format="json",
+            )["X-Profile"]
+            for _ in range(2)
+        ]
+        self.assertEqual(self.client.get(profiles[0]).status_code, 404)
+        self.assertEqual(self.client.get(profiles[1]).status_code, 200)
+
+    def test_staff_only(self):
+        response = self.client.post(
+            f"{reverse('plan-create')}?profile=1",
+            {"project_id": self.project.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("X-Profile"))
+
+        self.client.force_authenticate(self.staff)
+        profile = self.client.post(
+            f"{reverse('plan-create')}?profile=1",
+            {"project_id": self.project.id},
+            format="json",
+        )["X-Profile"]
+        self.client.force_authenticate(
+            User.objects.create(username="user", is_staff=False)
+        )
+        self.assertEqual(self.client.get(profile).status_code, 403)
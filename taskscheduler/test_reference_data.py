@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+
+import freezegun
+from django.conf import settings
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from taskscheduler.calendars import ResourceCalendar
+from taskscheduler.helpers import can_assign_resource
+from taskscheduler.models import Project, Resource, Skill, Task
+from taskscheduler.planner import Planner, PlanningError
+from taskscheduler.reference_data import (invalidate_reference_data,
+                                          reference_data)
+
+
+@freezegun.freeze_time("2023-07-17")
+class ReferenceDataTestCase(TransactionTestCase):
+    def setUp(self):
+        self.backend = Skill.objects.create(name="backend")
+        self.frontend = Skill.objects.create(name="frontend")
+        self.resource = Resource.objects.create(
+            name="Resource", availability_start_date=date.today()
+        )
+        self.resource.skills.set([self.backend])
+
+    def test_cached_until_changed(self):
+        data = reference_data()
+        self.assertEqual(
+            data.skills, {self.backend.id: "backend", self.frontend.id: "frontend"}
+        )
+        self.assertEqual(data.resources[self.resource.id].skill_ids, (self.backend.id,))
+        # Only the version is read
+        with self.assertNumQueries(1):
+            self.assertIs(reference_data(), data)
+
+        self.resource.skills.add(self.frontend)
+        self.assertEqual(
+            reference_data().resources[self.resource.id].skill_ids,
+            (self.backend.id, self.frontend.id),
+        )
+
+        self.resource.availability_end_date = date.today() + timedelta(days=10)
+        self.resource.save()
+        self.assertEqual(
+            reference_data().resources[self.resource.id].availability_end_date,
+            self.resource.availability_end_date,
+        )
+
+        Skill.objects.create(name="design")
+        self.assertEqual(len(reference_data().skills), 3)
+        self.resource.delete()
+        self.assertEqual(reference_data().resources, {})
+
+    def test_rolled_back_changes(self):
+        reference_data()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                other = Resource.objects.create(
+                    name="Other", availability_start_date=date.today()
+                )
+                # The transaction sees its own changes
+                self.assertIn(other.id, reference_data().resources)
+                raise RuntimeError
+        with transaction.atomic():
+            self.assertEqual(list(reference_data().resources), [self.resource.id])
+        self.assertEqual(list(reference_data().resources), [self.resource.id])
+
+    def test_change_seen_through_another_cache(self):
+        data = reference_data()
+        # Another worker's cache alias sharing the same backend
+        other_worker = {
+            **settings.CACHES,
+            "other_worker": settings.CACHES["reference_data"],
+        }
+        with override_settings(
+            CACHES=other_worker, REFERENCE_DATA_CACHE="other_worker"
+        ):
+            invalidate_reference_data()
+        self.assertIsNot(reference_data(), data)
+
+    def test_pending_changes_read_once(self):
+        with transaction.atomic():
+            self.resource.skills.add(self.frontend)
+            data = reference_data()
+            with self.assertNumQueries(0):
+                self.assertIs(reference_data(), data)
+            Skill.objects.create(name="design")
+            self.assertEqual(len(reference_data().skills), 3)
+
+    def test_resource_added_elsewhere(self):
+        reference_data()
+        # bulk_create sends no signal, as if another process added the resource
+        (other,) = Resource.objects.bulk_create(
+            [Resource(name="Other", availability_start_date=date.today())]
+        )
+        other.skills.through.objects.create(resource=other, skill=self.backend)
+        project = Project.objects.create(
+            name="Project", is_deleted=False, completed=False
+        )
+        task = Task.objects.create(
+            project=project,
+            name="Task",
+            estimation=2,
+            is_deleted=False,
+            completed=False,
+        )
+        task.skills_required.set([self.backend])
+        tomorrow = date.today() + timedelta(days=1)
+        self.assertTrue(
+            can_assign_resource(
+                other.id, task.id, tomorrow, tomorrow + timedelta(days=2)
+            )
+        )
+
+        (late,) = Resource.objects.bulk_create(
+            [Resource(name="Late", availability_start_date=date.today())]
+        )
+        late.skills.through.objects.create(resource=late, skill=self.backend)
+        planner = Planner()
+        (task,) = Planner.load_tasks([task.id])
+        planned = planner.assign_task(
+            task, late.id, tomorrow, tomorrow + timedelta(days=2)
+        )
+        self.assertEqual(planned["resource_id"], late.id)
+        with self.assertRaises(PlanningError):
+            planner.assign_task(task, late.id + 1, tomorrow, tomorrow)
+        with self.assertRaises(PlanningError):
+            planner.plan_task(task, late.id + 1)
+
+    def test_scheduling_reads_no_reference_data(self):
+        project = Project.objects.create(
+            name="Project", is_deleted=False, completed=False
+        )
+        task = Task.objects.create(
+            project=project,
+            name="Task",
+            estimation=2,
+            is_deleted=False,
+            completed=False,
+        )
+        task.skills_required.set([self.backend])
+        invalidate_reference_data()
+        Planner()
+
+        # Only the shared version is read once the reference data is cached,
+        # the calendars only when a task needs them
+        with self.assertNumQueries(1):
+            Planner()
+        tomorrow = date.today() + timedelta(days=1)
+        with self.assertNumQueries(4):
+            self.assertTrue(
+                can_assign_resource(
+                    self.resource.id, task.id, tomorrow, tomorrow + timedelta(days=2)
+                )
+            )
+        # With a calendar only the version, the task and its skills are read
+        calendar = ResourceCalendar([(tomorrow, tomorrow, 1)])
+        with self.assertNumQueries(6):
+            self.assertFalse(
+                can_assign_resource(
+                    self.resource.id, task.id, tomorrow, tomorrow, calendar=calendar
+                )
+            )
+            self.assertTrue(
+                can_assign_resource(
+                    self.resource.id, task.id, tomorrow, tomorrow, 1, calendar
+                )
+            )
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+import freezegun
+from django.core.management import call_command
+from django.test import TestCase
+
+from taskscheduler.models import Assignments, Project, Resource, Skill, Task
+
+
+@freezegun.freeze_time("2023-07-17")
+class ScheduleDataTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        skills = [
+            Skill.objects.create(name=f'Skill "{i}", new\nline') for i in range(2)
+        ]
+        project = Project.objects.create(name="Project", is_deleted=False)
+        # Empty strings are not nulls, nor is the null marker itself
+        Project.objects.create(name="", is_deleted=False)
+        Project.objects.create(name="\\N", is_deleted=False)
+        resource = Resource.objects.create(
+            name="Resource", availability_start_date=date.today()
+        )
+        resource.skills.set(skills)
+        for day in range(1, 6):
+            task = Task.objects.create(
+                project=project,
+                name=f"Task {day}",
+                estimation=1,
+                is_deleted=False,
+                completed=False,
+            )
+            task.skills_required.set(skills[:1])
+            Assignments.objects.create(
+                task=task,
+                resource=resource,
+                start_date=date(2023, 7, 2 * day),
+                end_date=date(2023, 7, 2 * day + 1),
+                status="ASSIGNED",
+            )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def snapshot(self):
+        return {
+            model: list(model.objects.order_by("id").values())
+            for model in (Project, Skill, Resource, Task, Assignments)
+        } | {
+            "skills": list(
+                Task.skills_required.through.objects.order_by("id").values_list()
+            ),
+        }
+
+    def clear(self):
+        for model in (Assignments, Task, Resource, Skill, Project):
+            model._base_manager.all().delete()
+
+    def test_round_trip(self):
+        for format in ("csv", "jsonl"):
+            expected = self.snapshot()
+            call_command(
+                "export_schedule_data",
+                self.directory.name,
+                "--format",
+                format,
+                stdout=StringIO(),
+            )
+            self.clear()
+            call_command(
+                "import_schedule_data",
+                self.directory.name,
+                "--format",
+                format,
+                "--batch-size",
+                "2",
+                stdout=StringIO(),
+            )
+            self.assertEqual(self.snapshot(), expected)
+            self.assertFalse(
+                os.path.exists(
+                    os.path.join(self.directory.name, ".import_checkpoint.json")
+                )
+            )
+
+    def test_resume_from_checkpoint(self):
+        call_command("export_schedule_data", self.directory.name, stdout=StringIO())
+        Assignments.objects.all().delete()
+        # The first three assignments were imported by a run that stopped
+        with open(
+            os.path.join(self.directory.name, ".import_checkpoint.json"), "w"
+        ) as f:
+            json.dump({"assignment": 3}, f)
+
+        call_command(
+            "import_schedule_data",
+            self.directory.name,
+            "--tables",
+            "assignment",
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            list(Assignments.objects.values_list("start_date__day", flat=True)),
+            [8, 10],
+        )
+
+    def test_missing_period_is_derived(self):
+        task = Task.objects.first()
+        Assignments.objects.all().delete()
+        with open(os.path.join(self.directory.name, "assignment.csv"), "w") as f:
+            f.write("id,task_id,resource_id,start_date,end_date,status\n")
+            f.write(
+                f"100,{task.id},{Resource.objects.get().id},"
+                "2023-08-01,2023-08-03,ASSIGNED\n"
+            )
+        call_command("import_schedule_data", self.directory.name, stdout=StringIO())
+        assignment = Assignments.objects.get(id=100)
+        self.assertEqual(assignment.period.lower, date(2023, 8, 1))
+        self.assertEqual(assignment.period.upper, date(2023, 8, 4))
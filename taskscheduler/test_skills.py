@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+
+from taskscheduler.models import Resource, Skill
+from taskscheduler.skills import SkillIndex
+
+
+class SkillIndexTestCase(SimpleTestCase):
+    def test_candidates(self):
+        index = SkillIndex([(3, [1, 2]), (1, [1]), (2, [2, 3])])
+        self.assertEqual(index.candidates(index.mask([1])), [1, 3])
+        self.assertEqual(index.candidates(index.mask([1, 2])), [3])
+        self.assertEqual(index.candidates(index.mask([4])), [])
+        self.assertEqual(index.candidates(0), [1, 2, 3])
+
+    def test_remove_resource_skills(self):
+        index = SkillIndex([(1, [1, 2]), (2, [2])])
+        index.remove_resource_skills(1, [2])
+        self.assertEqual(index.candidates(index.mask([2])), [2])
+        self.assertFalse(index.has_skills(1, index.mask([2])))
+
+
+class SkillIndexSignalsTestCase(TestCase):
+    def test_index_follows_skill_changes(self):
+        backend = Skill.objects.create(name="backend")
+        frontend = Skill.objects.create(name="frontend")
+        resource = Resource.objects.create(
+            name="Resource 1", availability_start_date=date.today()
+        )
+        index = SkillIndex()
+
+        resource.skills.set([backend])
+        self.assertEqual(index.candidates(index.mask([backend.id])), [resource.id])
+
+        resource.skills.set([frontend])
+        self.assertEqual(index.candidates(index.mask([backend.id])), [])
+        self.assertEqual(index.candidates(index.mask([frontend.id])), [resource.id])
+
+        frontend.resource_set.clear()
+        self.assertEqual(index.candidates(index.mask([frontend.id])), [])
+
+        other = Resource.objects.create(
+            name="Resource 2", availability_start_date=date.today()
+        )
+        other.skills.add(backend)
+        resource.delete()
+        self.assertEqual(index.candidates(index.mask([backend.id])), [other.id])
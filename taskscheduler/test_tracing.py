@@ -0,0 +1,106 @@
+import json
+from datetime import date, timedelta
+
+import freezegun
+from django.test import TestCase, override_settings
+
+from taskscheduler.models import Project, Resource, Skill, Task
+from taskscheduler.planner import Planner, PlanningError
+from taskscheduler.tracing import PlanTrace
+
+
+@freezegun.freeze_time("2023-07-17")
+class PlanTraceTestCase(TestCase):
+    def setUp(self):
+        today = date.today()
+        backend = Skill.objects.create(name="backend")
+        design = Skill.objects.create(name="design")
+        self.available = Resource.objects.create(
+            name="Available", availability_start_date=today
+        )
+        self.later = Resource.objects.create(
+            name="Later", availability_start_date=today + timedelta(days=10)
+        )
+        designer = Resource.objects.create(
+            name="Designer", availability_start_date=today
+        )
+        self.available.skills.set([backend])
+        self.later.skills.set([backend])
+        designer.skills.set([design])
+        project = Project.objects.create(
+            name="Project", is_deleted=False, completed=False
+        )
+        self.task = Task.objects.create(
+            project=project,
+            name="Task",
+            estimation=2,
+            start_date=today + timedelta(days=5),
+            is_deleted=False,
+            completed=False,
+        )
+        self.task.skills_required.set([backend])
+        self.backend = backend
+        self.design_task = Task.objects.create(
+            project=project,
+            name="Design",
+            estimation=1,
+            is_deleted=False,
+            completed=False,
+        )
+        self.design_task.skills_required.set([design])
+
+    def test_trace(self):
+        planner = Planner(trace=PlanTrace())
+        with self.assertLogs("taskscheduler.trace", "INFO") as logs:
+            planner.plan(Planner.load_tasks([self.task.id]))
+
+        trace = json.loads(logs.records[0].getMessage())
+        self.assertEqual(trace["run_id"], planner.trace.run_id)
+        self.assertEqual(trace["task_id"], self.task.id)
+        self.assertEqual(trace["skills"], [self.backend.id])
+        self.assertEqual(trace["candidates"], 2)
+        self.assertEqual(trace["skill_pruned"], 1)
+        self.assertEqual(
+            trace["pruned"],
+            [{"resource_id": self.later.id, "reason": "available_after_start"}],
+        )
+        self.assertEqual(trace["gaps_examined"], 1)
+        self.assertEqual(
+            trace["chosen"],
+            {
+                "resource_id": self.available.id,
+                "start_date": "2023-07-22",
+                "end_date": "2023-07-24",
+            },
+        )
+        self.assertEqual(
+            set(trace["us"]), {"candidates", "availability", "gap_search", "total"}
+        )
+
+    @override_settings(PLANNER_WORKERS=2, PLANNER_PARALLEL_MIN_TASKS=0)
+    def test_trace_in_parallel(self):
+        planner = Planner(trace=PlanTrace())
+        # The workers hand their events to the parent which logs them
+        with self.assertLogs("taskscheduler.trace", "INFO") as logs:
+            planner.plan(Planner.load_tasks([self.task.id, self.design_task.id]))
+        traces = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual(
+            sorted(trace["task_id"] for trace in traces),
+            [self.task.id, self.design_task.id],
+        )
+        self.assertEqual({trace["run_id"] for trace in traces}, {planner.trace.run_id})
+
+    def test_failed_task(self):
+        self.available.delete()
+        planner = Planner(trace=PlanTrace())
+        with self.assertLogs("taskscheduler.trace", "INFO") as logs:
+            with self.assertRaises(PlanningError):
+                planner.plan(Planner.load_tasks([self.task.id]))
+        trace = json.loads(logs.records[0].getMessage())
+        self.assertIsNone(trace["chosen"])
+        self.assertEqual(trace["pruned_count"], 1)
+
+    def test_sampling(self):
+        self.assertIsNone(Planner().trace)
+        with override_settings(PLANNER_TRACE_SAMPLE_RATE=1):
+            self.assertIsNotNone(Planner().trace)
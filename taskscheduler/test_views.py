@@ -1,6 +1,9 @@
 from datetime import date, timedelta
 
 import freezegun
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
@@ -26,6 +29,24 @@ class ProjectAPITestCase(APITestCase):
         project_id = response.json()["id"]
         self.assertIsNotNone(project_id)
 
+    def test_list_projects_by_cursor(self):
+        projects = [
+            Project.objects.create(name=f"Project {i}", is_deleted=False)
+            for i in range(5)
+        ]
+        response = self.client.get(reverse("project-list"), {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["previous"])
+
+        seen = []
+        url = response.json()["next"]
+        seen.extend(project["id"] for project in response.json()["results"])
+        while url:
+            response = self.client.get(url)
+            seen.extend(project["id"] for project in response.json()["results"])
+            url = response.json()["next"]
+        self.assertEqual(seen, [project.id for project in projects])
+
     def test_update_project(self):
         url = reverse("project-list")
         data = {
@@ -160,6 +181,121 @@ class TaskAPITestCase(APITestCase):
         self.assertIn("assignment", response.data)
         self.assertIn("assigned_resource", response.data)
 
+    def test_list_with_assignments_query_count(self):
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {"show_assignments": "true"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries), response.json()["results"]
+
+        def add_task(day):
+            task = Task.objects.create(
+                project=self.project,
+                name="Test Task",
+                estimation=1,
+                created_date=date.today(),
+                is_deleted=False,
+                completed=False,
+            )
+            task.skills_required.set([self.skill])
+            Assignments.objects.create(
+                status="ASSIGNED",
+                resource=self.resource,
+                task=task,
+                start_date=date.today() + timedelta(days=2 * day),
+                end_date=date.today() + timedelta(days=2 * day + 1),
+            )
+            return task
+
+        task = add_task(0)
+        task_queries, tasks = count_queries(reverse("task-list"))
+        resource_queries, resources = count_queries(reverse("resource-list"))
+        self.assertEqual(tasks[0]["assigned_resource"], self.resource.id)
+        self.assertEqual(resources[0]["assignments"][0]["task"], task.id)
+
+        for day in range(1, 10):
+            add_task(day)
+        Resource.objects.create(name="Resource 2", availability_start_date=date.today())
+        self.assertEqual(count_queries(reverse("task-list"))[0], task_queries)
+        resource_count, resources = count_queries(reverse("resource-list"))
+        self.assertEqual(resource_count, resource_queries)
+        self.assertEqual(len(resources[0]["assignments"]), 10)
+
+    def test_bulk_create_tasks(self):
+        def bulk_create(count):
+            data = [
+                {
+                    "project": self.project.id,
+                    "name": f"Task {i}",
+                    "estimation": 2,
+                    "completed": False,
+                    "skills_required": [self.skill.id],
+                }
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse("task-bulk"), data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.json()), count)
+            return len(queries)
+
+        self.assertEqual(bulk_create(2), bulk_create(20))
+        self.assertEqual(
+            Task.skills_required.through.objects.filter(skill=self.skill).count(), 22
+        )
+
+    def test_bulk_create_reports_errors_per_item(self):
+        data = [
+            {
+                "project": self.project.id,
+                "name": "Task",
+                "completed": False,
+                "skills_required": [self.skill.id],
+            },
+            {"project": 0, "name": "Task", "completed": False, "skills_required": []},
+            {"name": "Task", "completed": False, "skills_required": [0]},
+        ]
+        response = self.client.post(reverse("task-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn("project", errors[1])
+        self.assertIn("skills_required", errors[2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update_tasks(self):
+        tasks = [
+            Task.objects.create(
+                project=self.project,
+                name="Test Task",
+                estimation=3,
+                is_deleted=False,
+                completed=False,
+            )
+            for _ in range(2)
+        ]
+        Assignments.objects.create(
+            status="ASSIGNED",
+            resource=self.resource,
+            task=tasks[0],
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=1),
+        )
+        data = [
+            {"id": tasks[0].id, "completed": True},
+            {"id": tasks[1].id, "estimation": 5, "skills_required": [self.skill.id]},
+        ]
+        response = self.client.patch(reverse("task-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()[1]["skills_required"], [self.skill.id])
+        self.assertEqual(Task.objects.get(id=tasks[1].id).estimation, 5)
+        self.assertEqual(Assignments.objects.get().status, "COMPLETED")
+
+        response = self.client.patch(
+            reverse("task-bulk"), [{"id": 0, "estimation": 1}], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_update_completed_task(self):
         task = Task.objects.create(
             project=self.project,
@@ -318,3 +454,70 @@ class AssignmentsViewSetTestCase(APITestCase):
         response = self.client.get(f"/api/assignment/{assignment.id}/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data["id"], assignment.id)
+
+
+@freezegun.freeze_time("2023-07-17")
+class FastSerializationTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        project = Project.objects.create(name="Project", is_deleted=False)
+        skills = [Skill.objects.create(name=f"Skill {i}") for i in range(3)]
+        resource = Resource.objects.create(
+            name="Resource", availability_start_date=date.today()
+        )
+        resource.skills.set(skills[:2])
+        Resource.objects.create(name="Idle", availability_start_date=date.today())
+        for day in range(3):
+            task = Task.objects.create(
+                project=project,
+                name=f"Task {day}",
+                estimation=1,
+                start_date=date.today() if day else None,
+                is_deleted=False,
+                completed=False,
+            )
+            task.skills_required.set(skills[day:])
+            Assignments.objects.create(
+                status="ASSIGNED" if day else "COMPLETED",
+                resource=resource,
+                task=task,
+                start_date=date.today() + timedelta(days=2 * day),
+                end_date=date.today() + timedelta(days=2 * day + 1),
+            )
+        self.urls = [
+            reverse("task-list"),
+            reverse("task-detail", args=[task.id]),
+            reverse("resource-list"),
+            reverse("resource-detail", args=[resource.id]),
+            reverse("assignments-list"),
+        ]
+
+    def test_same_output_as_serializers(self):
+        for url in self.urls:
+            for params in ({}, {"show_assignments": "true"}):
+                expected = self.client.get(url, params).json()
+                with override_settings(API_FAST_SERIALIZATION=True):
+                    response = self.client.get(url, params)
+                self.assertEqual(response.json(), expected, url)
+
+    def test_sparse_fields(self):
+        url = reverse("task-list")
+        params = {"fields": "id,name,start_date,end_date"}
+        with CaptureQueriesContext(connection) as queries:
+            tasks = self.client.get(url, params).json()["results"]
+        self.assertEqual(list(tasks[0]), ["id", "name", "start_date", "end_date"])
+        # Neither the estimation column nor the skills are read
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("estimation", queries[0]["sql"])
+        with override_settings(API_FAST_SERIALIZATION=True):
+            self.assertEqual(self.client.get(url, params).json()["results"], tasks)
+
+        resource = self.client.get(
+            reverse("resource-list"), {"omit": "skills,availability_end_date"}
+        ).json()["results"][0]
+        self.assertEqual(list(resource), ["id", "name", "availability_start_date"])
+
+    @override_settings(API_FAST_SERIALIZATION=True)
+    def test_missing_object(self):
+        response = self.client.get(reverse("task-detail", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
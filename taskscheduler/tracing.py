@@ -0,0 +1,121 @@
+import copy
+import json
+import logging
+import random
+import time
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger("taskscheduler.trace")
+
+
+class TaskTrace:
+    """
+    What finding the earliest assignment of one task decided, and the
+    microseconds spent on each step.
+    """
+
+    def __init__(self, plan_trace, task):
+        self.plan_trace = plan_trace
+        self.task = task
+        self.candidates = 0
+        self.skill_pruned = 0
+        self.pruned = []
+        self.pruned_count = 0
+        self.gaps_examined = 0
+        self.steps = {"candidates": 0, "availability": 0, "gap_search": 0}
+        self.started = self.lap_started = time.perf_counter_ns()
+
+    def lap(self, step):
+        now = time.perf_counter_ns()
+        self.steps[step] += now - self.lap_started
+        self.lap_started = now
+
+    def found_candidates(self, candidates, resources):
+        self.lap("candidates")
+        self.candidates = len(candidates)
+        self.skill_pruned = resources - len(candidates)
+
+    def prune(self, resource):
+        self.lap("availability")
+        task = self.task
+        if task.start_date is not None and (
+            resource.availability_start_date > task.start_date
+        ):
+            reason = "available_after_start"
+        else:
+            reason = "unavailable_before_end"
+        self.pruned_count += 1
+        if len(self.pruned) < settings.PLANNER_TRACE_MAX_PRUNED:
+            self.pruned.append({"resource_id": resource.id, "reason": reason})
+
+    def searched_gap(self):
+        self.lap("gap_search")
+        self.gaps_examined += 1
+
+    def finish(self, start_date, end_date, resource_id):
+        total = time.perf_counter_ns() - self.started
+        chosen = None
+        if start_date is not None:
+            chosen = {
+                "resource_id": resource_id,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+            }
+        self.plan_trace.emit(
+            {
+                "run_id": self.plan_trace.run_id,
+                "task_id": self.task.id,
+                "skills": [skill.id for skill in self.task.skills_required.all()],
+                "estimation": self.task.estimation,
+                "candidates": self.candidates,
+                "skill_pruned": self.skill_pruned,
+                "pruned_count": self.pruned_count,
+                "pruned": self.pruned,
+                "gaps_examined": self.gaps_examined,
+                "chosen": chosen,
+                "us": {
+                    **{step: ns // 1000 for step, ns in self.steps.items()},
+                    "total": total // 1000,
+                },
+            }
+        )
+
+
+class PlanTrace:
+    """
+    Logs a TaskTrace for every task of a plan run as one JSON line on the
+    taskscheduler.trace logger, the lines of a run share its run_id.
+    """
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex
+        # Kept instead of logged by a planner worker, see deferred
+        self.events = None
+
+    @classmethod
+    def sample(cls):
+        # Only a share of the plan runs pay for tracing
+        rate = getattr(settings, "PLANNER_TRACE_SAMPLE_RATE", 0)
+        if rate and random.random() < rate:
+            return cls()
+        return None
+
+    def deferred(self):
+        """
+        The same run keeping its events, for a worker process whose log
+        records would not reach the parent's handlers.
+        """
+        trace = copy.copy(self)
+        trace.events = []
+        return trace
+
+    def emit(self, event):
+        if self.events is not None:
+            self.events.append(event)
+        else:
+            logger.info(json.dumps(event))
+
+    def start_task(self, task):
+        return TaskTrace(self, task)
@@ -1,8 +1,12 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from .metrics import metrics_view
+from .profiling import ProfileView
 from .views import (AssignmentsCreateView, AssignmentsViewSet, PlanCreateView,
-                    ProjectViewSet, ResourceViewSet, SkillViewSet, TaskViewSet)
+                    PlanJobViewSet, PortfolioCreateView, ProjectViewSet,
+                    ReplanCreateView, ResourceViewSet, SkillViewSet,
+                    TaskViewSet)
 
 router = routers.DefaultRouter()
 router.register("projects", ProjectViewSet)
@@ -10,10 +14,17 @@ router.register("tasks", TaskViewSet)
 router.register("resources", ResourceViewSet)
 router.register("skill", SkillViewSet)
 router.register("assignment", AssignmentsViewSet)
+router.register("jobs", PlanJobViewSet)
 
 
 urlpatterns = [
     path("api/", include(router.urls)),
     path("api/plan/", PlanCreateView.as_view(), name="plan-create"),
     path("api/assign/", AssignmentsCreateView.as_view(), name="assign"),
+    path("api/replan/", ReplanCreateView.as_view(), name="replan"),
+    path("api/portfolio/", PortfolioCreateView.as_view(), name="portfolio"),
+    path(
+        "api/profiles/<uuid:profile_id>/", ProfileView.as_view(), name="profile-detail"
+    ),
+    path("metrics", metrics_view, name="metrics"),
 ]
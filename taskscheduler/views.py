@@ -1,23 +1,34 @@
 import logging
-import traceback
 
-from django.db import transaction
-from django.http import JsonResponse
-from rest_framework import status, viewsets
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import JsonResponse, QueryDict, StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import serializers, status, viewsets
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from taskscheduler.helpers import can_assign_resource, find_earliest_assignment
-from taskscheduler.models import Assignments, Project, Resource, Skill, Task
+from taskscheduler.bulk import BulkMixin
+from taskscheduler.helpers import is_assignment_overlap
+from taskscheduler.middleware import SerializeTimingMixin
+from taskscheduler.models import (Assignments, PlanJob, Project, Resource,
+                                  Skill, Task)
+from taskscheduler.planner import (Planner, PlanningError, iter_tasks,
+                                   read_only_snapshot)
+from taskscheduler.profiling import ProfileMixin
+from taskscheduler.projections import ProjectionMixin, SparseFieldsMixin
+from taskscheduler.renderers import NDJSONRenderer
 from taskscheduler.serializers import (AssignmentsSerializer, AssignSerializer,
-                                       PlanSerializer, ProjectSerializer,
-                                       ResourceSerializer, SkillSerializer,
-                                       TaskSerializer)
+                                       PlanJobSerializer, PlanSerializer,
+                                       PortfolioSerializer, ProjectSerializer,
+                                       ReplanSerializer, ResourceSerializer,
+                                       SkillSerializer, TaskSerializer)
 
 logger = logging.getLogger()
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(SerializeTimingMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
 
@@ -36,7 +47,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(
+    SerializeTimingMixin, BulkMixin, ProjectionMixin, viewsets.ModelViewSet
+):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
 
@@ -49,177 +62,194 @@ class TaskViewSet(viewsets.ModelViewSet):
         assignments.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def retrieve(self, request, *args, **kwargs):
-        show_assignments = request.GET.get("show_assignments", False)
-        response = super().retrieve(request, *args, **kwargs)
-        if show_assignments:
-            if response.status_code == 200:
-                task_data = response.data
-                task_id = task_data["id"]
-                assignment = Assignments.objects.filter(task=task_id).first()
-                if assignment:
-                    task_data["assignment"] = assignment.id
-                    task_data["assigned_resource"] = assignment.resource.id
-        return response
-
-
-class ResourceViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants_field("skills_required"):
+            queryset = queryset.prefetch_related(
+                Prefetch("skills_required", queryset=Skill.objects.order_by("id"))
+            )
+        if self.request.GET.get("show_assignments", False):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "assignments",
+                    queryset=Assignments.objects.only(
+                        "id", "task_id", "resource_id"
+                    ).order_by("id"),
+                )
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["show_assignments"] = self.request.GET.get("show_assignments", False)
+        return context
+
+    def project_rows(self, rows):
+        tasks = super().project_rows(rows)
+        if self.request.GET.get("show_assignments", False):
+            assignments = {}
+            for task_id, assignment_id, resource_id in (
+                Assignments.objects.filter(task_id__in=[row["id"] for row in rows])
+                .order_by("-id")
+                .values_list("task_id", "id", "resource_id")
+            ):
+                assignments[task_id] = (assignment_id, resource_id)
+            for row, task in zip(rows, tasks):
+                if row["id"] in assignments:
+                    task["assignment"], task["assigned_resource"] = assignments[
+                        row["id"]
+                    ]
+        return tasks
+
+
+class ResourceViewSet(
+    SerializeTimingMixin, BulkMixin, ProjectionMixin, viewsets.ModelViewSet
+):
     queryset = Resource.objects.all()
     serializer_class = ResourceSerializer
 
-    def retrieve(self, request, *args, **kwargs):
-        show_assignments = request.GET.get("show_assignments", False)
-        response = super().retrieve(request, *args, **kwargs)
-        if show_assignments:
-            if response.status_code == 200:
-                resource = response.data
-                resource_id = resource["id"]
-                assignments = Assignments.objects.filter(
-                    resource=resource_id, status="ASSIGNED"
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants_field("skills"):
+            queryset = queryset.prefetch_related(
+                Prefetch("skills", queryset=Skill.objects.order_by("id"))
+            )
+        if self.request.GET.get("show_assignments", False):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "assignments",
+                    queryset=Assignments.objects.filter(status="ASSIGNED")
+                    .only("id", "task_id", "resource_id", "start_date", "end_date")
+                    .order_by("id"),
+                )
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["show_assignments"] = self.request.GET.get("show_assignments", False)
+        return context
+
+    def project_rows(self, rows):
+        resources = super().project_rows(rows)
+        if self.request.GET.get("show_assignments", False):
+            assignments = {row["id"]: [] for row in rows}
+            for resource_id, *assignment in (
+                Assignments.objects.filter(
+                    resource_id__in=assignments, status="ASSIGNED"
+                )
+                .order_by("id")
+                .values_list("resource_id", "id", "task_id", "start_date", "end_date")
+            ):
+                assignments[resource_id].append(
+                    dict(
+                        zip(
+                            ("assignment", "task", "start_date", "end_date"), assignment
+                        )
+                    )
                 )
-                assignments_list = []
-                for assignment in assignments:
-                    assignment_dict = {}
-                    assignment_dict["assignment"] = assignment.id
-                    assignment_dict["task"] = assignment.task.id
-                    assignment_dict["start_date"] = assignment.start_date
-                    assignment_dict["end_date"] = assignment.end_date
-                    assignments_list.append(assignment_dict)
-                resource["assignments"] = assignments_list
-        return response
-
-
-class SkillViewSet(viewsets.ModelViewSet):
+            for row, resource in zip(rows, resources):
+                resource["assignments"] = assignments[row["id"]]
+        return resources
+
+
+class SkillViewSet(
+    SerializeTimingMixin, BulkMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
 
 
-class PlanCreateView(APIView):
+def wants_async(request):
+    # ?async=0 or ?async=false still run the request right away
+    return request.query_params.get("async") in serializers.BooleanField.TRUE_VALUES
+
+
+def queue_plan_job(kind, serializer_class, data):
+    # Validating up front so a bad request fails now instead of in the worker
+    serializer = serializer_class(data=data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if isinstance(data, QueryDict):
+        data = data.dict()
+    job = PlanJob.objects.create(kind=kind, payload=data)
+    logger.info(f"Queued {kind} job {job.id}")
+    return Response(
+        {"job_id": job.id, "status": job.status},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": reverse("planjob-detail", args=[job.id])},
+    )
+
+
+class PlanCreateView(ProfileMixin, APIView):
     http_method_names = ["post"]
     serializer_class = PlanSerializer
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
 
     def post(self, request, *args, **kwargs):
-        serializer = PlanSerializer(data=request.data)
+        if wants_async(request):
+            return queue_plan_job("PLAN", PlanSerializer, request.data)
+        if request.accepted_renderer.format == "ndjson":
+            return self.stream(request.data)
+        return self.run(request.data)
+
+    def planned_assignments(self, planner, serializer, stream=False):
+        project_id = serializer.data.get("project_id")
+        if project_id:
+            # Get a list of unfinshed tasks give priority to task with start date and sort by project created time
+            unassigned_tasks = (
+                Task.unassigned_objects.filter(project=project_id)
+                .order_by("start_date", "id")
+                .prefetch_related("skills_required")
+            )
+            if stream:
+                return planner.iter_plan(iter_tasks(unassigned_tasks))
+            return planner.plan(unassigned_tasks)
+        unassigned_tasks = serializer.data.get("tasks") or []
+        tasks = planner.load_tasks([task.get("task_id") for task in unassigned_tasks])
+        return [
+            planner.plan_task(task, item.get("resource_id"))
+            for task, item in zip(tasks, unassigned_tasks)
+        ]
+
+    def stream(self, data):
+        serializer = PlanSerializer(data=data)
+        if serializer.is_valid():
+            return StreamingHttpResponse(
+                self.stream_plan(serializer), content_type=NDJSONRenderer.media_type
+            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def stream_plan(self, serializer):
+        # The status is sent before planning starts so errors end the stream instead
+        renderer = NDJSONRenderer()
+        try:
+            with read_only_snapshot():
+                planner = Planner()
+                for planned_assignment in self.planned_assignments(
+                    planner, serializer, stream=True
+                ):
+                    yield renderer.render_line(planned_assignment)
+        except PlanningError as e:
+            logger.warning(f"Task {e.task_id} could not be planned: {e}")
+            yield renderer.render_line({"message": str(e)})
+        except Exception as e:
+            logger.exception("Failed while streaming the plan", exc_info=True)
+            yield renderer.render_line({"message": "Dry run failed", "error": str(e)})
+
+    def run(self, data):
+        serializer = PlanSerializer(data=data)
         if serializer.is_valid():
             try:
-                with transaction.atomic():
-                    # TODO: Lot of duplicate code make helper function to reduce it
-                    planned_assignments = []
-                    project_id = serializer.data.get("project_id")
-                    if project_id:
-                        # Get a list of unfinshed tasks give priority to task with start date and sort by project created time
-                        unassigned_tasks = Task.unassigned_objects.filter(
-                            project=project_id
-                        ).order_by("start_date", "id")
-                        for task in unassigned_tasks:
-                            (
-                                start_date,
-                                end_date,
-                                resource_id,
-                            ) = find_earliest_assignment(task.id)
-                            if not start_date or not end_date or not resource_id:
-                                transaction.set_rollback(True)
-                                logger.warning(
-                                    f"Task {task.id} could not be scheduled becasue we have another assignment."
-                                )
-                                return JsonResponse(
-                                    {
-                                        "message": f"Task {task.id} could not be scheduled."
-                                    },
-                                    status=400,
-                                )
-                            planned_assignment = {
-                                "task_id": task.id,
-                                "resource_id": resource_id,
-                                "start_date": start_date,
-                                "end_date": end_date,
-                            }
-                            existing_assignment = Assignments.objects.filter(
-                                task_id=task.id, resource_id=resource_id
-                            ).first()
-                            if existing_assignment:
-                                transaction.set_rollback(True)
-                                logger.warning(
-                                    "Task {task.id} is already assigned to the resource."
-                                )
-                                return JsonResponse(
-                                    {
-                                        "message": f"Task {task.id} is already assigned to the resource."
-                                    },
-                                    status=400,
-                                )
-                            assignment = Assignments(
-                                task_id=task.id,
-                                resource_id=resource_id,
-                                start_date=start_date,
-                                end_date=end_date,
-                                status="ASSIGNED",
-                            )
-                            assignment.save()
-                            planned_assignments.append(planned_assignment)
-                        transaction.set_rollback(True)
-                        logger.info(
-                            "Creating just the plan not the assignment rolling back"
-                        )
-                        return Response(planned_assignments)
-                    else:
-                        unassigned_tasks = serializer.data.get("tasks")
-                        if unassigned_tasks:
-                            for task in unassigned_tasks:
-                                task_id = task.get("task_id")
-                                resource_id = task.get("resource_id")
-                                (
-                                    start_date,
-                                    end_date,
-                                    resource_id,
-                                ) = find_earliest_assignment(task_id, resource_id)
-                                if not start_date or not end_date or not resource_id:
-                                    transaction.set_rollback(True)
-                                    logger.warning(
-                                        f"Task {task.id} could not be scheduled since the resource was not having a slot."
-                                    )
-                                    return JsonResponse(
-                                        {
-                                            "message": f"Task {task.id} could not be scheduled."
-                                        },
-                                        status=400,
-                                    )
-                                planned_assignment = {
-                                    "task_id": task_id,
-                                    "resource_id": resource_id,
-                                    "start_date": start_date,
-                                    "end_date": end_date,
-                                }
-                                existing_assignment = Assignments.objects.filter(
-                                    task_id=task_id, resource_id=resource_id
-                                ).first()
-                                if existing_assignment:
-                                    transaction.set_rollback(True)
-                                    logger.warning(
-                                        f"Task {task_id} is already assigned to the resource."
-                                    )
-                                    return JsonResponse(
-                                        {
-                                            "message": f"Task {task_id} is already assigned to the resource."
-                                        },
-                                        status=400,
-                                    )
-                                assignment = Assignments(
-                                    task_id=task_id,
-                                    resource_id=resource_id,
-                                    start_date=start_date,
-                                    end_date=end_date,
-                                    status="ASSIGNED",
-                                )
-                                assignment.save()
-                                planned_assignments.append(planned_assignment)
-                        transaction.set_rollback(True)
-                        logger.info(
-                            "Creating just the plan not the assignment rolling back"
-                        )
-                        return Response(planned_assignments)
+                # The plan is only simulated in memory, nothing is written
+                with read_only_snapshot():
+                    planner = Planner()
+                    planned_assignments = self.planned_assignments(planner, serializer)
+                return Response(planned_assignments)
+            except PlanningError as e:
+                logger.warning(f"Task {e.task_id} could not be planned: {e}")
+                return JsonResponse({"message": str(e)}, status=400)
             except Exception as e:
-                print(traceback.format_exc())
                 error_message = str(e)
                 error_response = {"message": "Dry run failed", "error": error_message}
                 logger.exception("Failed while creating the plan", exc_info=True)
@@ -227,140 +257,71 @@ class PlanCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AssignmentsCreateView(APIView):
+class AssignmentsCreateView(ProfileMixin, APIView):
     http_method_names = ["post"]
     serializer_class = AssignSerializer
 
     def post(self, request, *args, **kwargs):
-        serializer = AssignSerializer(data=request.data)
+        if wants_async(request):
+            return queue_plan_job("ASSIGN", AssignSerializer, request.data)
+        return self.run(request.data)
+
+    def run(self, data):
+        serializer = AssignSerializer(data=data)
         if serializer.is_valid():
             try:
                 with transaction.atomic():
-                    planned_assignments = []
                     project_id = serializer.data.get("project_id")
                     if project_id:
+                        planner = Planner()
                         # Get a list of unfinshed tasks give priority to task with start date and sort by project created time
-                        unassigned_tasks = Task.unassigned_objects.filter(
-                            project=project_id
-                        ).order_by("start_date", "id")
-                        for task in unassigned_tasks:
-                            (
-                                start_date,
-                                end_date,
-                                resource_id,
-                            ) = find_earliest_assignment(task.id)
-                            planned_assignment = {
-                                "task_id": task.id,
-                                "resource_id": resource_id,
-                                "start_date": start_date,
-                                "end_date": end_date,
-                            }
-                            if not start_date or not end_date or not resource_id:
-                                transaction.set_rollback(True)
-                                logger.warning(
-                                    f"Task {task.id} could not be scheduled."
-                                )
-                                return JsonResponse(
-                                    {
-                                        "message": f"Task {task.id} could not be scheduled."
-                                    },
-                                    status=400,
-                                )
-                            existing_assignment = Assignments.objects.filter(
-                                task_id=task.id, resource_id=resource_id
-                            ).first()
-                            if existing_assignment:
-                                transaction.set_rollback(True)
-                                logger.warning(
-                                    f"Task {task.id} is already assigned to the resource."
+                        unassigned_tasks = (
+                            Task.unassigned_objects.filter(project=project_id)
+                            .order_by("start_date", "id")
+                            .prefetch_related("skills_required")
+                        )
+                        planned_assignments = planner.plan(unassigned_tasks)
+                    else:
+                        planned_assignments = []
+                        unassigned_tasks = serializer.validated_data.get("tasks") or []
+                        planner = Planner()
+                        tasks = planner.load_tasks(
+                            [task["task_id"].id for task in unassigned_tasks]
+                        )
+                        for task, item in zip(tasks, unassigned_tasks):
+                            resource_id = (
+                                item["resource_id"].id if item["resource_id"] else None
+                            )
+                            start_date = item.get("start_date")
+                            end_date = item.get("end_date")
+                            if start_date and end_date and resource_id:
+                                # Double booking is rejected by the assignment_no_overlap constraint
+                                planned_assignment = planner.assign_task(
+                                    task,
+                                    resource_id,
+                                    start_date.date(),
+                                    end_date.date(),
+                                    check_conflicts=False,
                                 )
-                                return JsonResponse(
-                                    {
-                                        "message": f"Task {task.id} is already assigned to the resource."
-                                    },
-                                    status=400,
+                            else:
+                                planned_assignment = planner.plan_task(
+                                    task, resource_id
                                 )
-                            assignment = Assignments(
-                                task_id=task.id,
-                                resource_id=resource_id,
-                                start_date=start_date,
-                                end_date=end_date,
-                                status="ASSIGNED",
-                            )
-                            assignment.save()
                             planned_assignments.append(planned_assignment)
-                        return Response(planned_assignments)
-                    else:
-                        unassigned_tasks = serializer.data.get("tasks")
-                        if unassigned_tasks:
-                            for task in unassigned_tasks:
-                                task_id = task.get("task_id")
-                                resource_id = task.get("resource_id")
-                                start_date = task.get("start_date")
-                                end_date = task.get("end_date")
-                                if start_date and end_date:
-                                    if not can_assign_resource(
-                                        resource_id, task_id, start_date, end_date
-                                    ):
-                                        transaction.set_rollback(True)
-                                        logger.warning(
-                                            f"Cannot Task {task_id} to the resource {resource_id}"
-                                        )
-                                        return JsonResponse(
-                                            {
-                                                "message": f"Cannot Task {task_id} to the resource {resource_id}."
-                                            },
-                                            status=400,
-                                        )
-                                else:
-                                    (
-                                        start_date,
-                                        end_date,
-                                        resource_id,
-                                    ) = find_earliest_assignment(task_id, resource_id)
-                                if not start_date or not end_date or not resource_id:
-                                    transaction.set_rollback(True)
-                                    logger.warning(
-                                        f"Task {task.id} could not be scheduled for the given resource."
-                                    )
-                                    return JsonResponse(
-                                        {
-                                            "message": f"Task {task.id} could not be scheduled."
-                                        },
-                                        status=400,
-                                    )
-                                planned_assignment = {
-                                    "task_id": task_id,
-                                    "resource_id": resource_id,
-                                    "start_date": start_date,
-                                    "end_date": end_date,
-                                }
-                                existing_assignment = Assignments.objects.filter(
-                                    task_id=task_id, resource_id=resource_id
-                                ).first()
-                                if existing_assignment:
-                                    transaction.set_rollback(True)
-                                    logger.warning(
-                                        f"Task {task.id} is already assigned to the resource."
-                                    )
-                                    return JsonResponse(
-                                        {
-                                            "message": f"Task {task_id} is already assigned to the resource."
-                                        },
-                                        status=400,
-                                    )
-                                assignment = Assignments(
-                                    task_id=task_id,
-                                    resource_id=resource_id,
-                                    start_date=start_date,
-                                    end_date=end_date,
-                                    status="ASSIGNED",
-                                )
-                                assignment.save()
-                                planned_assignments.append(planned_assignment)
-                        return Response(planned_assignments)
+                    planner.commit()
+                    return Response(planned_assignments)
+            except PlanningError as e:
+                logger.warning(f"Task {e.task_id} could not be assigned: {e}")
+                return JsonResponse({"message": str(e)}, status=400)
+            except IntegrityError as e:
+                if not is_assignment_overlap(e):
+                    raise
+                logger.warning("Assignment conflicts with an existing assignment")
+                return JsonResponse(
+                    {"message": "Resource is already assigned during this period."},
+                    status=409,
+                )
             except Exception as e:
-                print(traceback.format_exc())
                 error_message = str(e)
                 error_response = {"message": "Dry run failed", "error": error_message}
                 logger.exception("Failed while creating the assignment", exc_info=True)
@@ -368,7 +329,108 @@ class AssignmentsCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AssignmentsViewSet(viewsets.ModelViewSet):
+class PortfolioCreateView(APIView):
+    http_method_names = ["post"]
+    serializer_class = PortfolioSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = PortfolioSerializer(data=request.data)
+        if serializer.is_valid():
+            commit = serializer.validated_data["commit"]
+            try:
+                # All the projects share one snapshot and are written together
+                with transaction.atomic() if commit else read_only_snapshot():
+                    planner = Planner()
+                    planned_assignments = planner.plan_projects(
+                        (project["project_id"], project["priority"])
+                        for project in serializer.validated_data["projects"]
+                    )
+                    if commit:
+                        planner.commit()
+                    return Response(planned_assignments)
+            except PlanningError as e:
+                logger.warning(f"Task {e.task_id} could not be planned: {e}")
+                return JsonResponse({"message": str(e)}, status=400)
+            except IntegrityError as e:
+                if not is_assignment_overlap(e):
+                    raise
+                logger.warning("Portfolio plan conflicts with an existing assignment")
+                return JsonResponse(
+                    {"message": "Resource is already assigned during this period."},
+                    status=409,
+                )
+            except Exception as e:
+                error_message = str(e)
+                error_response = {
+                    "message": "Portfolio plan failed",
+                    "error": error_message,
+                }
+                logger.exception("Failed while planning the portfolio", exc_info=True)
+                return Response(error_response, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ReplanCreateView(APIView):
+    http_method_names = ["post"]
+    serializer_class = ReplanSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = ReplanSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                with transaction.atomic():
+                    planner = Planner()
+                    planned_assignments = planner.replan(
+                        serializer.data.get("task_id"),
+                        serializer.data.get("resource_id"),
+                        serializer.validated_data.get("since"),
+                    )
+                    if not serializer.validated_data.get("dry_run"):
+                        planner.commit()
+                    return Response(planned_assignments)
+            except PlanningError as e:
+                logger.warning(f"Task {e.task_id} could not be replanned: {e}")
+                return JsonResponse({"message": str(e)}, status=400)
+            except IntegrityError as e:
+                if not is_assignment_overlap(e):
+                    raise
+                logger.warning("Replanned assignment conflicts with an existing one")
+                return JsonResponse(
+                    {"message": "Resource is already assigned during this period."},
+                    status=409,
+                )
+            except Exception as e:
+                error_message = str(e)
+                error_response = {"message": "Replan failed", "error": error_message}
+                logger.exception("Failed while replanning", exc_info=True)
+                return Response(error_response, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class PlanJobViewSet(
+    SerializeTimingMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet
+):
+    queryset = PlanJob.objects.all()
+    serializer_class = PlanJobSerializer
+
+
+class AssignmentsViewSet(SerializeTimingMixin, ProjectionMixin, viewsets.ModelViewSet):
     queryset = Assignments.objects.all()
     serializer_class = AssignmentsSerializer
     http_method_names = ["get", "put", "patch", "delete"]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == "ndjson":
+            return StreamingHttpResponse(
+                NDJSONRenderer().render_rows(self.iter_rows()),
+                content_type=NDJSONRenderer.media_type,
+            )
+        return super().list(request, *args, **kwargs)
+
+    def iter_rows(self):
+        # Rows are read through a server side cursor and never become model instances
+        projection = self.get_projection()
+        queryset = self.get_projected_queryset().order_by("id")
+        for row in queryset.iterator(chunk_size=2000):
+            yield projection.project(row)